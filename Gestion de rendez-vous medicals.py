@@ -1,141 +1,95 @@
 import tkinter as tk
-from tkinter import messagebox, simpledialog, ttk
-from PIL import Image, ImageTk
+from tkinter import filedialog, messagebox, ttk
 import sqlite3
+import bisect
+import functools
+import glob
+import hashlib
 import os
+import queue
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import count, islice
 from tkcalendar import DateEntry
-from typing import List, Tuple, Optional
-
-# Configuration de la connexion à la base de données
-database_path = 'appointments_db.sqlite'
-
-def create_database_and_table() -> None:
-    try:
-        conn = sqlite3.connect(database_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS appointments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT NOT NULL,
-                time TEXT NOT NULL,
-                patient_name TEXT NOT NULL,
-                gender TEXT NOT NULL,
-                age INTEGER NOT NULL,
-                consultation_reason TEXT NOT NULL,
-                doctor_name TEXT NOT NULL,
-                doctor_specialty TEXT NOT NULL
-            )
-        ''')
-        conn.commit()
-        cursor.close()
-        conn.close()
-    except sqlite3.Error as err:
-        print(f"Erreur lors de la création de la base de données ou de la table: {err}")
-
-def add_appointment(date: str, time: str, patient_name: str, gender: str, age: int, consultation_reason: str, doctor_name: str, doctor_specialty: str) -> None:
-    try:
-        conn = sqlite3.connect(database_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO appointments (date, time, patient_name, gender, age, consultation_reason, doctor_name, doctor_specialty)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (date, time, patient_name, gender, age, consultation_reason, doctor_name, doctor_specialty))
-        conn.commit()
-        cursor.close()
-        conn.close()
-    except sqlite3.Error as err:
-        print(f"Erreur lors de l'ajout du rendez-vous: {err}")
-
-def delete_appointment(appointment_id: int) -> None:
-    try:
-        conn = sqlite3.connect(database_path)
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM appointments WHERE id = ?', (appointment_id,))
-        conn.commit()
-        cursor.close()
-        conn.close()
-    except sqlite3.Error as err:
-        print(f"Erreur lors de la suppression du rendez-vous: {err}")
-
-def modify_appointment(appointment_id: int, date: str, time: str, patient_name: str, gender: str, age: int, consultation_reason: str, doctor_name: str, doctor_specialty: str) -> None:
-    try:
-        conn = sqlite3.connect(database_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            UPDATE appointments
-            SET date = ?, time = ?, patient_name = ?, gender = ?, age = ?, consultation_reason = ?, doctor_name = ?, doctor_specialty = ?
-            WHERE id = ?
-        ''', (date, time, patient_name, gender, age, consultation_reason, doctor_name, doctor_specialty, appointment_id))
-        conn.commit()
-        cursor.close()
-        conn.close()
-    except sqlite3.Error as err:
-        print(f"Erreur lors de la modification du rendez-vous: {err}")
-
-def display_appointments() -> List[Tuple]:
-    try:
-        conn = sqlite3.connect(database_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM appointments')
-        appointments = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return appointments
-    except sqlite3.Error as err:
-        print(f"Erreur lors de l'affichage des rendez-vous: {err}")
-        return []
-
-def search_appointments_by_patient(patient_name: str) -> List[Tuple]:
-    try:
-        conn = sqlite3.connect(database_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM appointments WHERE patient_name LIKE ?', ('%' + patient_name + '%',))
-        appointments = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return appointments
-    except sqlite3.Error as err:
-        print(f"Erreur lors de la recherche des rendez-vous par patient: {err}")
-        return []
-
-def search_appointments_by_doctor(doctor_name: str) -> List[Tuple]:
-    try:
-        conn = sqlite3.connect(database_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM appointments WHERE doctor_name LIKE ?', ('%' + doctor_name + '%',))
-        appointments = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return appointments
-    except sqlite3.Error as err:
-        print(f"Erreur lors de la recherche des rendez-vous par docteur: {err}")
-        return []
-
-def generate_receipt(appointment_id: int) -> str:
+from typing import Callable, Dict, Iterator, List, Tuple, Optional, Union
+
+import rendezvous_core
+from rendezvous_core import APPOINTMENT_COLUMNS, LIVE_SEARCH_LIMIT, PAGE_SIZE, SORT_COLUMNS, narrow_appointments, validate_appointment
+from rendezvous_metrics import profiled
+
+APPOINTMENT_HEADERS = ("ID", "Date", "Heure", "Nom du patient", "Genre", "Âge", "Raison de consultation", "Nom du docteur", "Spécialité du docteur")
+# Dossier des images redimensionnées une fois pour toutes au lieu de l'être à chaque démarrage
+ASSET_CACHE_DIR = '.asset_cache'
+# Prépare les images dans un thread pendant que le reste de la fenêtre principale se construit
+PRELOAD_ASSETS_IN_BACKGROUND = True
+
+# Fonctions d'accès aux données : la base locale par défaut, ou un service partagé (voir use_service)
+backend = rendezvous_core
+
+def use_service(url: str) -> None:
+    global backend
+    from rendezvous_client import ServiceBackend
+
+    backend = ServiceBackend(url)
+
+def cached_asset(source_path: str, size: Tuple[int, int]) -> str:
+    # Renvoie le chemin d'une copie redimensionnée que Tk charge directement (PPM sans transparence, PNG sinon).
+    # La clé dépend du chemin source, de sa date de modification et de la taille demandée.
+    source_key = hashlib.sha1(os.path.abspath(source_path).encode('utf-8')).hexdigest()[:16]
+    prefix = os.path.join(ASSET_CACHE_DIR, f'{source_key}_{size[0]}x{size[1]}_')
+    stem = f'{prefix}{os.stat(source_path).st_mtime_ns}'
+    for extension in ('.ppm', '.png'):
+        if os.path.exists(stem + extension):
+            return stem + extension
+
+    from PIL import Image
+
+    image = Image.open(source_path)
+    transparent = image.mode in ('RGBA', 'LA', 'P')
+    image = image.convert('RGBA' if transparent else 'RGB').resize(size, Image.LANCZOS)
+    os.makedirs(ASSET_CACHE_DIR, exist_ok=True)
+    cache_path = stem + ('.png' if transparent else '.ppm')
+    temporary_path = f'{cache_path}.{os.getpid()}.tmp'
+    image.save(temporary_path, format='PNG' if transparent else 'PPM')
+    os.replace(temporary_path, cache_path)
+    # Les variantes générées pour une ancienne version de l'image ne servent plus
+    for stale_path in glob.glob(glob.escape(prefix) + '*'):
+        if not stale_path.startswith(stem):
+            try:
+                os.remove(stale_path)
+            except OSError:
+                pass
+    return cache_path
+
+def preload_assets(specs: List[Tuple[str, Tuple[int, int]]]) -> Dict[str, Future]:
+    # Prépare les copies en cache ; les PhotoImage sont ensuite créées sur le thread Tk
+    futures: Dict[str, Future] = {}
+    if PRELOAD_ASSETS_IN_BACKGROUND:
+        loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix='assets')
+        for source_path, size in specs:
+            if os.path.exists(source_path):
+                futures[source_path] = loader.submit(cached_asset, source_path, size)
+        loader.shutdown(wait=False)
+    else:
+        for source_path, size in specs:
+            if os.path.exists(source_path):
+                future: Future = Future()
+                future.set_result(cached_asset(source_path, size))
+                futures[source_path] = future
+    return futures
+
+def load_photo(futures: Dict[str, Future], source_path: str) -> Optional[tk.PhotoImage]:
+    future = futures.get(source_path)
+    if future is None:
+        return None
     try:
-        conn = sqlite3.connect(database_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM appointments WHERE id = ?', (appointment_id,))
-        appointment = cursor.fetchone()
-        cursor.close()
-        conn.close()
-
-        if appointment:
-            receipt = f'''
-            Receipt for Appointment ID: {appointment[0]}
-            Patient Name: {appointment[3]}
-            Appointment Date: {appointment[1]}
-            Appointment Time: {appointment[2]}
-            Doctor Name: {appointment[7]}
-            '''
-            return receipt
-        else:
-            return "Rendez-vous non trouvé."
-    except sqlite3.Error as err:
-        print(f"Erreur lors de la génération du reçu: {err}")
-        return "Erreur lors de la génération du reçu."
+        return tk.PhotoImage(file=future.result())
+    except (OSError, tk.TclError) as err:
+        print(f"Erreur lors du chargement de l'image {source_path}: {err}")
+        return None
 
-def center_window(window: tk.Tk) -> None:
+def center_window(window: Union[tk.Tk, tk.Toplevel]) -> None:
     window.update_idletasks()
     width = window.winfo_width()
     height = window.winfo_height()
@@ -143,7 +97,231 @@ def center_window(window: tk.Tk) -> None:
     y = (window.winfo_screenheight() // 2) - (height // 2)
     window.geometry('{}x{}+{}+{}'.format(width, height, x, y))
 
+class DatabaseExecutor:
+    # Thread dédié aux accès à la base : les callbacks Tk ne bloquent jamais sur une requête.
+    # Les résultats reviennent au thread Tk par une file relevée avec after().
+    POLL_INTERVAL_MS = 30
+
+    def __init__(self) -> None:
+        self._requests: queue.Queue = queue.Queue()
+        self._results: queue.Queue = queue.Queue()
+        self._tickets = count(1)
+        # Pour chaque clé, le numéro de la requête la plus récente : les précédentes sont obsolètes
+        self._latest: Dict[str, int] = {}
+        self._running: Optional[Tuple[int, Optional[str], Optional[sqlite3.Connection]]] = None
+        self._running_lock = threading.Lock()
+        self._pending = 0
+        self._busy_listeners: List[Callable[[bool], None]] = []
+        self._widget: Optional[tk.Misc] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, widget: tk.Misc) -> None:
+        self._widget = widget
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='db-worker', daemon=True)
+            self._thread.start()
+        widget.after(self.POLL_INTERVAL_MS, self._poll)
+
+    def shutdown(self) -> None:
+        if self._thread is not None:
+            self._requests.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def add_busy_listener(self, listener: Callable[[bool], None]) -> None:
+        self._busy_listeners.append(listener)
+
+    def submit(self, function: Callable, *args, on_done: Optional[Callable] = None, on_error: Optional[Callable] = None,
+               key: Optional[str] = None, background: bool = False) -> int:
+        ticket = next(self._tickets)
+        if key is not None:
+            self.cancel(key)
+            self._latest[key] = ticket
+        # Une requête de fond (relevé périodique) n'allume pas l'indicateur d'activité
+        if not background:
+            self._set_pending(self._pending + 1)
+        # Sans RENDEZVOUS_PROFILE, profiled() renvoie le callback tel quel
+        on_done = on_done and profiled(on_done)
+        on_error = on_error and profiled(on_error)
+        self._requests.put((ticket, key, function, args, on_done, on_error, background))
+        return ticket
+
+    def cancel(self, key: str) -> None:
+        self._latest[key] = next(self._tickets)
+        with self._running_lock:
+            # Interrompt la requête SQLite en cours si elle porte la même clé
+            # (impossible à travers le service : la réponse arrivera, puis sera ignorée)
+            if self._running is not None and self._running[1] == key and self._running[2] is not None:
+                self._running[2].interrupt()
+
+    def _is_obsolete(self, ticket: int, key: Optional[str]) -> bool:
+        return key is not None and self._latest.get(key) != ticket
+
+    def _run(self) -> None:
+        while True:
+            request = self._requests.get()
+            if request is None:
+                backend.close_connections()
+                return
+            ticket, key, function, args, on_done, on_error, background = request
+            result = error = None
+            if not self._is_obsolete(ticket, key):
+                with self._running_lock:
+                    self._running = (ticket, key, backend.get_connection())
+                try:
+                    result = function(*args)
+                except Exception as err:
+                    error = err
+                finally:
+                    with self._running_lock:
+                        self._running = None
+            self._results.put((ticket, key, result, error, on_done, on_error, background))
+
+    def _poll(self) -> None:
+        # Reprogrammé avant de livrer les résultats : un callback qui ouvre une boîte modale ne bloque pas les suivants
+        self._widget.after(self.POLL_INTERVAL_MS, self._poll)
+        while True:
+            try:
+                ticket, key, result, error, on_done, on_error, background = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if not background:
+                self._set_pending(self._pending - 1)
+            if self._is_obsolete(ticket, key):
+                continue
+            try:
+                if error is not None:
+                    (on_error or show_database_error)(error)
+                elif on_done is not None:
+                    on_done(result)
+            except tk.TclError:
+                # La fenêtre qui attendait ce résultat a été fermée entre-temps
+                pass
+
+    def _set_pending(self, pending: int) -> None:
+        was_busy = self._pending > 0
+        self._pending = pending
+        if was_busy != (pending > 0):
+            for listener in self._busy_listeners:
+                listener(pending > 0)
+
+db_executor = DatabaseExecutor()
+
+# Changements transmis aux vues : l'état actuel de chaque rendez-vous touché (None s'il a été supprimé),
+# ou None à la place du dictionnaire quand le journal ne suffit plus et qu'il faut tout recharger
+Changes = Optional[Dict[int, Optional[Tuple]]]
+
+class ChangeWatcher:
+    # Relève le journal des modifications à intervalle régulier : les vues ouvertes n'appliquent que ce qui a
+    # changé depuis le relevé précédent, y compris les écritures des autres postes, au lieu de tout recharger.
+    POLL_INTERVAL_MS = 2000
+
+    def __init__(self) -> None:
+        self.position: Optional[int] = None
+        self._listeners: List[Callable[[Changes], None]] = []
+        self._widget: Optional[tk.Misc] = None
+
+    def start(self, widget: tk.Misc) -> None:
+        self._widget = widget
+        db_executor.submit(backend.change_log_position, on_done=self._started, background=True)
+
+    def _started(self, position: int) -> None:
+        self.position = position
+        self._widget.after(self.POLL_INTERVAL_MS, self._tick)
+
+    def _tick(self) -> None:
+        self._widget.after(self.POLL_INTERVAL_MS, self._tick)
+        self.poll()
+
+    def poll(self) -> None:
+        # Appelé aussi juste après une écriture de ce poste, pour l'afficher sans attendre le prochain relevé
+        if self.position is not None:
+            db_executor.submit(backend.changes_since, self.position, key='changes', on_done=self._dispatch,
+                               on_error=lambda error: None, background=True)
+
+    def _dispatch(self, result: Tuple[int, Changes]) -> None:
+        self.position, changes = result
+        if changes == {}:
+            return
+        for listener in list(self._listeners):
+            listener(changes)
+
+    def watch(self, widget: tk.Misc, listener: Callable[[Changes], None]) -> None:
+        # La vue cesse d'être prévenue quand son widget est détruit
+        self._listeners.append(listener)
+        widget.bind('<Destroy>', lambda event: event.widget is widget and self._listeners.remove(listener), add='+')
+
+change_watcher = ChangeWatcher()
+
+# Fenêtre principale, seul interpréteur Tcl de l'application ; les écrans sont des Toplevel qui en dépendent
+main_window: Optional[tk.Tk] = None
+# Écrans déjà construits, par nom : les rouvrir ne fait que les réafficher
+views: Dict[str, tk.Toplevel] = {}
+
+def open_view(name: str, title: str, geometry: str, bg: str, build: Callable[[tk.Toplevel], None]) -> tk.Toplevel:
+    window = views.get(name)
+    if window is None or not window.winfo_exists():
+        window = views[name] = tk.Toplevel(main_window)
+        window.title(title)
+        window.geometry(geometry)
+        window.config(bg=bg)
+        center_window(window)
+        # Fermer l'écran le masque seulement : il resservira tel quel, tenu à jour par change_watcher
+        window.protocol('WM_DELETE_WINDOW', window.withdraw)
+        build(window)
+    else:
+        window.deiconify()
+    window.lift()
+    window.focus_set()
+    return window
+
+def show_database_error(error: Exception) -> None:
+    messagebox.showerror("Erreur", f"Erreur lors de l'accès à la base de données : {error}")
+
+def show_saved(message: str) -> None:
+    change_watcher.poll()
+    messagebox.showinfo("Succès", message)
+
+def show_save_result(result: Optional[int], message: str, failure: str) -> None:
+    # None : l'écriture a échoué (le détail est sur stderr), ne pas annoncer un succès
+    if result is None:
+        messagebox.showerror("Erreur", failure)
+        return
+    show_saved(message)
+
+def conflict_checked(function: Callable, allow_conflict: bool) -> Callable:
+    # Le service revérifie le créneau au moment d'écrire : un conflit accepté par l'utilisateur ne doit pas le bloquer
+    if allow_conflict and backend is not rendezvous_core:
+        return functools.partial(function, allow_conflict=True)
+    return function
+
+def check_appointment_fields(date: str, time: str, patient_name: str, gender: str, age: str, consultation_reason: str,
+                             doctor_name: str, doctor_specialty: str, on_confirmed: Callable[[Tuple, bool], None],
+                             appointment_id: Optional[int] = None) -> None:
+    # on_confirmed reçoit les valeurs validées (espaces retirés, âge entier) : ce sont elles qui sont vérifiées
+    # puis enregistrées, comme dans la ligne de commande et le service
+    try:
+        values = validate_appointment({'date': date, 'time': time, 'patient_name': patient_name, 'gender': gender, 'age': age,
+                                       'consultation_reason': consultation_reason, 'doctor_name': doctor_name,
+                                       'doctor_specialty': doctor_specialty})
+    except ValueError as err:
+        messagebox.showerror("Erreur", f"Rendez-vous invalide : {err}")
+        return
+    date, time, _, _, _, _, doctor_name, _ = values
+
+    def on_conflict_checked(conflict_id: Optional[int]) -> None:
+        if conflict_id is not None and not messagebox.askyesno(
+                "Conflit d'horaire",
+                f"{doctor_name} a déjà un rendez-vous (n° {conflict_id}) sur ce créneau.\nEnregistrer quand même ?"):
+            return
+        on_confirmed(values, conflict_id is not None)
+
+    db_executor.submit(backend.find_conflict, doctor_name, date, time, appointment_id, on_done=on_conflict_checked)
+
 def add_appointment_gui() -> None:
+    open_view('add', "Ajouter un nouveau rendez-vous", '950x500', 'green', build_add_view)
+
+def build_add_view(window: tk.Toplevel) -> None:
     def submit() -> None:
         date = entry_date.get()
         time = entry_time.get()
@@ -153,16 +331,35 @@ def add_appointment_gui() -> None:
         consultation_reason = reason_var.get()
         doctor_name = entry_doctor_name.get()
         doctor_specialty = specialty_var.get()
-        
-        add_appointment(date, time, patient_name, gender, int(age), consultation_reason, doctor_name, doctor_specialty)
-        messagebox.showinfo("Succès", "Rendez-vous ajouté avec succès")
 
-    window = tk.Tk()
-    window.title("Ajouter un nouveau rendez-vous")
-    window.geometry('700x500')
-    window.config(bg='green')
+        def save(values: Tuple, allow_conflict: bool) -> None:
+            db_executor.submit(conflict_checked(backend.add_appointment, allow_conflict), *values,
+                               on_done=lambda appointment_id: show_save_result(appointment_id, "Rendez-vous ajouté avec succès",
+                                                                                "Le rendez-vous n'a pas pu être ajouté."))
 
-    center_window(window)
+        check_appointment_fields(date, time, patient_name, gender, age, consultation_reason, doctor_name, doctor_specialty, save)
+
+    def suggest_slots() -> None:
+        db_executor.submit(backend.next_free_slots, entry_doctor_name.get().strip(), specialty_var.get(), on_done=show_slots, key='free-slots')
+
+    def show_slots(slots: List[Tuple[str, str, str]]) -> None:
+        slots_listbox.delete(0, tk.END)
+        suggested_slots[:] = slots
+        for date, time, doctor_name in suggested_slots:
+            slots_listbox.insert(tk.END, f"{date} {time} - {doctor_name}")
+        if not suggested_slots:
+            slots_listbox.insert(tk.END, "Aucun créneau libre trouvé")
+
+    def use_slot(event: tk.Event) -> None:
+        selection = slots_listbox.curselection()
+        if not selection or not suggested_slots:
+            return
+        date, time, doctor_name = suggested_slots[selection[0]]
+        entry_date.set_date(date)
+        entry_time.delete(0, tk.END)
+        entry_time.insert(0, time)
+        entry_doctor_name.delete(0, tk.END)
+        entry_doctor_name.insert(0, doctor_name)
 
     form_frame = tk.Frame(window, bg='green')
     form_frame.pack(expand=True)
@@ -176,7 +373,7 @@ def add_appointment_gui() -> None:
     tk.Label(form_frame, text="Nom du médecin", bg='green', fg='white', font=('Arial', 15, 'bold')).grid(row=6, column=0, pady=8, padx=5, sticky='w')
     tk.Label(form_frame, text="Spécialité du médecin", bg='green', fg='white', font=('Arial', 15, 'bold')).grid(row=7, column=0, pady=8, padx=5, sticky='w')
 
-    entry_date = DateEntry(form_frame, width=38, background='darkblue', foreground='white', borderwidth=2)
+    entry_date = DateEntry(form_frame, width=38, background='darkblue', foreground='white', borderwidth=2, date_pattern='yyyy-mm-dd')
     entry_time = tk.Entry(form_frame, width=40)
     entry_patient_name = tk.Entry(form_frame, width=40)
     gender_var = tk.StringVar(value='Homme')
@@ -202,229 +399,458 @@ def add_appointment_gui() -> None:
     specialty_menu = ttk.Combobox(form_frame, textvariable=specialty_var, values=['GENICOLOGUE', 'GENERALISTE', 'MEDECIN'], width=38)
     specialty_menu.grid(row=7, column=1, pady=5, padx=5)
     
-    tk.Button(form_frame, text="Ajouter", command=submit, bg='blue', fg='white', font=('Arial', 15, 'bold')).grid(row=8, column=0, columnspan=5, pady=14)
-    
-    window.mainloop()
-
-def display_appointments_gui() -> None:
-    appointments = display_appointments()
-    window = tk.Tk()
-    window.title("Tous les Rendez-vous")
-    window.geometry('900x500')
-    window.config(bg='white')
-
-    center_window(window)
-
-    tk.Label(window, text="Nom", font=("Arial", 10, "bold"), bg='white').grid(row=0, column=0, padx=10, pady=5, sticky='w')
-    tk.Label(window, text="Date", font=("Arial", 10, "bold"), bg='white').grid(row=0, column=1, padx=10, pady=5, sticky='w')
-    tk.Label(window, text="Heure", font=("Arial", 10, "bold"), bg='white').grid(row=0, column=2, padx=10, pady=5, sticky='w')
-    tk.Label(window, text="Genre", font=("Arial", 10, "bold"), bg='white').grid(row=0, column=3, padx=10, pady=5, sticky='w')
-    tk.Label(window, text="Âge", font=("Arial", 10, "bold"), bg='white').grid(row=0, column=4, padx=10, pady=5, sticky='w')
-    tk.Label(window, text="Raison de consultation", font=("Arial", 10, "bold"), bg='white').grid(row=0, column=5, padx=10, pady=5, sticky='w')
-    tk.Label(window, text="Nom du docteur", font=("Arial", 10, "bold"), bg='white').grid(row=0, column=6, padx=10, pady=5, sticky='w')
-    tk.Label(window, text="Spécialité du docteur", font=("Arial", 10, "bold"), bg='white').grid(row=0, column=7, padx=10, pady=5, sticky='w')
-
-    for idx, appointment in enumerate(appointments):
-        tk.Label(window, text=appointment[3], font=("Arial", 10, "italic"), bg='white').grid(row=idx + 1, column=0, padx=10, pady=5, sticky='w')
-        tk.Label(window, text=appointment[1], font=("Arial", 10, "italic"), bg='white').grid(row=idx + 1, column=1, padx=10, pady=5, sticky='w')
-        tk.Label(window, text=appointment[2], font=("Arial", 10, "italic"), bg='white').grid(row=idx + 1, column=2, padx=10, pady=5, sticky='w')
-        tk.Label(window, text=appointment[4], font=("Arial", 10, "italic"), bg='white').grid(row=idx + 1, column=3, padx=10, pady=5, sticky='w')
-        tk.Label(window, text=appointment[5], font=("Arial", 10, "italic"), bg='white').grid(row=idx + 1, column=4, padx=10, pady=5, sticky='w')
-        tk.Label(window, text=appointment[6], font=("Arial", 10, "italic"), bg='white').grid(row=idx + 1, column=5, padx=10, pady=5, sticky='w')
-        tk.Label(window, text=appointment[7], font=("Arial", 10, "italic"), bg='white').grid(row=idx + 1, column=6, padx=10, pady=5, sticky='w')
-        tk.Label(window, text=appointment[8], font=("Arial", 10, "italic"), bg='white').grid(row=idx + 1, column=7, padx=10, pady=5, sticky='w')
+    tk.Button(form_frame, text="Créneaux libres", command=suggest_slots, bg='white').grid(row=6, column=2, rowspan=2, padx=5)
+    suggested_slots: List[Tuple[str, str, str]] = []
+    slots_listbox = tk.Listbox(form_frame, width=30, height=5)
+    slots_listbox.grid(row=0, column=2, rowspan=6, padx=5, sticky='n')
+    slots_listbox.bind('<<ListboxSelect>>', use_slot)
 
-    window.mainloop()
+    tk.Button(form_frame, text="Ajouter", command=submit, bg='blue', fg='white', font=('Arial', 15, 'bold')).grid(row=8, column=0, columnspan=5, pady=14)
 
-def delete_appointment_gui() -> None:
-    def search_and_delete() -> None:
-        patient_name = entry_patient_name.get()
-        if patient_name:
-            appointments = search_appointments_by_patient(patient_name)
-            if not appointments:
-                messagebox.showinfo("Info", "Aucun rendez-vous trouvé pour ce patient.")
-                return
+# Source de lignes d'une grille : (colonne de tri, ordre décroissant) -> itérateur de rendez-vous
+RowSource = Callable[[str, bool], Iterator[Tuple]]
+
+class AppointmentTable(tk.Frame):
+    # Grille de rendez-vous : les lignes sont tirées de la source page par page quand le défilement approche de la fin
+    def __init__(self, master: tk.Misc, source: RowSource, page_size: int = PAGE_SIZE, local: bool = False) -> None:
+        super().__init__(master, bg='white')
+        self.source = source
+        self.page_size = page_size
+        # Source en mémoire : les pages sont lues sans passer par le thread de base de données
+        self.local = local
+        self.order_by = 'date'
+        self.descending = False
+        self.rows: Optional[Iterator[Tuple]] = None
+        self.exhausted = False
+        self.loading = False
+        # Clé propre à cette grille : un nouveau tri rend obsolète la page en cours de chargement
+        self.request_key = f'table-{id(self)}'
+        # Clés de tri des lignes affichées, en ordre croissant quel que soit le sens d'affichage
+        self.keys: List[Tuple] = []
+        self.row_keys: Dict[str, Tuple] = {}
+
+        self.tree = ttk.Treeview(self, columns=APPOINTMENT_COLUMNS, show='headings', selectmode='browse')
+        for column, header in zip(APPOINTMENT_COLUMNS, APPOINTMENT_HEADERS):
+            # Sur la base, seules les colonnes indexées se trient ; une source en mémoire se trie sur toutes
+            if local or column in SORT_COLUMNS:
+                self.tree.heading(column, text=header, command=lambda c=column: self.sort_by(c))
+            else:
+                self.tree.heading(column, text=header)
+            self.tree.column(column, width=60 if column in ('id', 'age') else 110, anchor='w')
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        if not local:
+            # Une source en mémoire est tenue à jour par la vue qui la fournit
+            change_watcher.watch(self, self.apply_changes)
+        self.reload()
+
+    def _sort_key(self, row: Tuple) -> Tuple:
+        return appointment_sort_key(self.order_by)(row)
+
+    def _on_scroll(self, first: str, last: str) -> None:
+        self.scrollbar.set(first, last)
+        if float(last) > 0.9:
+            self.load_more()
+
+    def load_more(self) -> None:
+        if self.exhausted or self.loading:
+            return
+        self.loading = True
+        if self.local:
+            self._show_page(list(islice(self.rows, self.page_size)))
+            return
+        db_executor.submit(lambda rows: list(islice(rows, self.page_size)), self.rows, on_done=self._show_page,
+                           on_error=self._page_failed, key=self.request_key)
+
+    def _page_failed(self, error: Exception) -> None:
+        # Sans cela, loading resterait vrai et plus aucune page ne serait demandée
+        self.loading = False
+        show_database_error(error)
+
+    def _show_page(self, rows: List[Tuple]) -> None:
+        self.loading = False
+        keys = []
+        for row in rows:
+            iid = str(row[0])
+            # Déjà inséré par apply_changes pendant le chargement de la page
+            if iid in self.row_keys:
+                continue
+            key = self.row_keys[iid] = self._sort_key(row)
+            keys.append(key)
+            self.tree.insert('', tk.END, iid=iid, values=row)
+        if self.descending:
+            self.keys[:0] = reversed(keys)
+        else:
+            self.keys += keys
+        self.exhausted = len(rows) < self.page_size
+
+    def reload(self) -> None:
+        selection = self.tree.selection()
+        self.tree.delete(*self.tree.get_children())
+        self.keys = []
+        self.row_keys = {}
+        self.rows = self.source(self.order_by, self.descending)
+        self.exhausted = False
+        self.loading = False
+        self.load_more()
+        # Source en mémoire : les lignes sont déjà là, la sélection survit au rechargement
+        kept = [iid for iid in selection if iid in self.row_keys]
+        if kept:
+            self.tree.selection_set(kept)
+
+    def apply_changes(self, changes: Changes) -> None:
+        if changes is None:
+            self.reload()
+            return
+        for appointment_id, row in changes.items():
+            iid = str(appointment_id)
+            key = self.row_keys.pop(iid, None)
+            if key is not None:
+                del self.keys[bisect.bisect_left(self.keys, key)]
+                self.tree.delete(iid)
+            if row is None:
+                continue
+            key = self._sort_key(row)
+            # Une ligne placée après la dernière chargée arrivera avec les pages suivantes
+            if not self.exhausted and (not self.keys or (key < self.keys[0] if self.descending else key > self.keys[-1])):
+                continue
+            position = bisect.bisect_left(self.keys, key)
+            self.keys.insert(position, key)
+            self.row_keys[iid] = key
+            self.tree.insert('', len(self.keys) - 1 - position if self.descending else position, iid=iid, values=row)
+
+    def set_source(self, source: RowSource) -> None:
+        self.source = source
+        self.reload()
+
+    def sort_by(self, column: str) -> None:
+        self.descending = not self.descending if column == self.order_by else False
+        self.order_by = column
+        for col, header in zip(APPOINTMENT_COLUMNS, APPOINTMENT_HEADERS):
+            arrow = (' ▼' if self.descending else ' ▲') if col == column else ''
+            self.tree.heading(col, text=header + arrow)
+        self.reload()
+
+    def selected_id(self) -> Optional[int]:
+        selection = self.tree.selection()
+        return int(selection[0]) if selection else None
+
+def appointment_sort_key(order_by: str) -> Callable[[Tuple], Tuple]:
+    # Même ordre que le ORDER BY de iter_appointments : date et heure suivent starts_at, l'id départage
+    if order_by in ('date', 'time'):
+        return lambda row: (row[1], row[2], row[0])
+    if order_by == 'id':
+        return lambda row: (row[0],)
+    index = APPOINTMENT_COLUMNS.index(order_by)
+    return lambda row: (row[index], row[0])
+
+def list_row_source(rows: List[Tuple]) -> RowSource:
+    # Source pour des résultats déjà en mémoire (tri effectué en Python)
+    def source(order_by: str, descending: bool) -> Iterator[Tuple]:
+        return iter(sorted(rows, key=appointment_sort_key(order_by), reverse=descending))
+    return source
+
+def query_row_source(**filters) -> RowSource:
+    # Source paginée par clé directement sur la base, tri poussé dans le ORDER BY
+    def source(order_by: str, descending: bool) -> Iterator[Tuple]:
+        return backend.iter_appointments(order_by, descending, **filters)
+    return source
+
+class LiveSearch(tk.Frame):
+    # Recherche au fil de la frappe. Tant que le texte tapé prolonge la recherche précédente et que
+    # celle-ci était complète, les rendez-vous déjà chargés sont filtrés en mémoire, sans requête ;
+    # sinon la requête part après une courte pause dans la frappe.
+    DEBOUNCE_MS = 150
+
+    def __init__(self, master: tk.Misc, targets: Tuple[str, ...] = ('patients', 'doctors'), bg: str = 'lightgreen') -> None:
+        super().__init__(master, bg=bg)
+        self.target_var = tk.StringVar(master=self, value=targets[0])
+        self.query_var = tk.StringVar(master=self)
+        self.results: List[Tuple] = []
+        self.complete = False
+        self.last_query = ''
+        self.last_target = ''
+        self._debounce: Optional[str] = None
+        self.request_key = f'live-search-{id(self)}'
+
+        bar = tk.Frame(self, bg=bg)
+        bar.pack(fill=tk.X)
+        entry = tk.Entry(bar, textvariable=self.query_var, width=40)
+        entry.pack(side=tk.LEFT, padx=5, pady=5)
+        entry.focus_set()
+        if len(targets) > 1:
+            for target, label in (('patients', "Patient"), ('doctors', "Médecin")):
+                tk.Radiobutton(bar, text=label, variable=self.target_var, value=target, bg=bg, command=self.on_change).pack(side=tk.LEFT)
+        self.status = tk.Label(bar, text="", bg=bg)
+        self.status.pack(side=tk.RIGHT, padx=5)
+        self.table = AppointmentTable(self, list_row_source([]), local=True)
+        self.table.pack(fill=tk.BOTH, expand=True)
+        self.query_var.trace_add('write', lambda *args: self.on_change())
+        change_watcher.watch(self, self.apply_changes)
+
+    def on_change(self) -> None:
+        query = self.query_var.get().strip()
+        target = self.target_var.get()
+        if self._debounce is not None:
+            self.after_cancel(self._debounce)
+            self._debounce = None
+        if not query:
+            db_executor.cancel(self.request_key)
+            self.show([], False, '', target)
+            return
+        if self.complete and self.last_query and target == self.last_target and query.casefold().startswith(self.last_query.casefold()):
+            self.show(narrow_appointments(self.results, target, query), True, query, target)
+            return
+        self._debounce = self.after(self.DEBOUNCE_MS, self.run_query)
 
-            def delete_selected_appointment() -> None:
-                selected_item = appointment_listbox.curselection()
-                if not selected_item:
-                    messagebox.showwarning("Avertissement", "Veuillez sélectionner un rendez-vous à supprimer.")
-                    return
+    def run_query(self) -> None:
+        self._debounce = None
+        query = self.query_var.get().strip()
+        target = self.target_var.get()
+        if not query:
+            return
+        self.status.config(text="Recherche...")
+        db_executor.submit(backend.search_appointments_by_prefix, target, query, key=self.request_key,
+                           on_done=lambda result: self.on_results(result, query, target))
+
+    def on_results(self, result: Tuple[List[Tuple], bool], query: str, target: str) -> None:
+        self.show(result[0], result[1], query, target)
+        # La frappe a pu continuer pendant la requête : on restreint ou on relance selon le texte actuel
+        if self.query_var.get().strip() != query or self.target_var.get() != target:
+            self.on_change()
+
+    def show(self, appointments: List[Tuple], complete: bool, query: str, target: str) -> None:
+        self.results = appointments
+        self.complete = complete
+        self.last_query = query
+        self.last_target = target
+        self.table.set_source(list_row_source(appointments))
+        if not query:
+            self.status.config(text="")
+        elif not appointments:
+            self.status.config(text="Aucun rendez-vous trouvé.")
+        else:
+            self.status.config(text=f"{len(appointments)} rendez-vous" + ("" if complete else f" (les {LIVE_SEARCH_LIMIT} premiers)"))
 
-                appointment_id = appointments[selected_item[0]][0]
-                delete_appointment(appointment_id)
-                messagebox.showinfo("Succès", "Rendez-vous supprimé avec succès")
-                window.destroy()
+    def refresh(self) -> None:
+        # Le résultat affiché ne peut plus servir de base au filtrage : nouvelle requête
+        self.complete = False
+        self.run_query()
 
-            window = tk.Toplevel()
-            window.title("Supprimer un Rendez-vous")
-            window.geometry('500x400')
-            window.config(bg='green')
-            center_window(window)
+    def apply_changes(self, changes: Changes) -> None:
+        if not self.last_query:
+            return
+        if changes is None or not self.complete:
+            self.refresh()
+            return
+        # Résultat complet : il suffit d'y retirer les rendez-vous touchés et d'y remettre ceux qui correspondent encore
+        appointments = [appointment for appointment in self.results if appointment[0] not in changes]
+        appointments += narrow_appointments([appointment for appointment in changes.values() if appointment is not None],
+                                            self.last_target, self.last_query)
+        if len(appointments) > LIVE_SEARCH_LIMIT:
+            self.refresh()
+            return
+        self.show(appointments, True, self.last_query, self.last_target)
+
+    def selected(self) -> Optional[Tuple]:
+        appointment_id = self.table.selected_id()
+        return next((appointment for appointment in self.results if appointment[0] == appointment_id), None)
+
+def import_appointments_gui() -> None:
+    path = filedialog.askopenfilename(title="Importer des rendez-vous",
+                                      filetypes=[("Fichiers CSV", "*.csv"), ("JSON Lines", "*.jsonl *.ndjson"), ("Tous les fichiers", "*.*")])
+    if not path:
+        return
+    db_executor.submit(backend.import_appointments, path, on_done=show_import_report, on_error=show_import_error)
+
+def show_import_error(error: Exception) -> None:
+    # Fichier absent ou illisible : aucun rendez-vous n'a été lu, ce n'est pas un import vide
+    change_watcher.poll()
+    messagebox.showerror("Import impossible", f"Le fichier n'a pas pu être importé : {error}")
+
+def show_import_report(report: Tuple[int, List[Tuple[int, str]]]) -> None:
+    imported, rejects = report
+    change_watcher.poll()
+    message = f"{imported} rendez-vous importés, {len(rejects)} lignes rejetées."
+    if rejects:
+        message += "\n\n" + "\n".join(f"Ligne {line_number}: {reason}" for line_number, reason in rejects[:10])
+        if len(rejects) > 10:
+            message += "\n..."
+        messagebox.showwarning("Import terminé", message)
+    else:
+        messagebox.showinfo("Import terminé", message)
 
-            tk.Label(window, text="Sélectionnez le rendez-vous à supprimer :", bg='green', fg='white', font=('Arial', 12)).pack(pady=10)
+def display_appointments_gui() -> None:
+    open_view('display', "Tous les Rendez-vous", '900x500', 'white', build_display_view)
 
-            appointment_listbox = tk.Listbox(window, width=80)
-            appointment_listbox.pack(pady=10)
+def build_display_view(window: tk.Toplevel) -> None:
+    AppointmentTable(window, query_row_source()).pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-            for appointment in appointments:
-                appointment_listbox.insert(tk.END, f"{appointment[0]} - {appointment[3]} - {appointment[1]} - {appointment[2]}")
+def delete_appointment_gui() -> None:
+    open_view('delete', "Supprimer un rendez-vous", '900x500', 'green', build_delete_view)
 
-            tk.Button(window, text="Supprimer", command=delete_selected_appointment, bg='blue', fg='white').pack(pady=10)
+def build_delete_view(window: tk.Toplevel) -> None:
+    def delete_selected_appointment() -> None:
+        appointment_id = search.table.selected_id()
+        if appointment_id is None:
+            messagebox.showwarning("Avertissement", "Veuillez sélectionner un rendez-vous à supprimer.")
+            return
+        db_executor.submit(backend.delete_appointment, appointment_id, on_done=deleted)
 
-    window = tk.Tk()
-    window.title("Supprimer un rendez-vous")
-    window.geometry('400x200')
-    window.config(bg='green')
-    center_window(window)
+    def deleted(result: None) -> None:
+        show_saved("Rendez-vous supprimé avec succès")
 
     tk.Label(window, text="Entrez le nom du patient :", bg='green', fg='white').pack(pady=10)
-    entry_patient_name = tk.Entry(window, width=40)
-    entry_patient_name.pack(pady=10)
-    tk.Button(window, text="Rechercher et supprimer", command=search_and_delete, bg='blue', fg='white').pack(pady=10)
-
-    window.mainloop()
+    search = LiveSearch(window, targets=('patients',), bg='green')
+    search.pack(fill=tk.BOTH, expand=True, padx=10)
+    tk.Button(window, text="Supprimer", command=delete_selected_appointment, bg='blue', fg='white').pack(pady=10)
 
 def modify_appointment_gui() -> None:
-    patient_name = CustomStringDialog("Entrée", "Entrez le nom du patient pour modifier ses rendez-vous").result
-    if patient_name:
-        appointments = search_appointments_by_patient(patient_name)
-        if not appointments:
-            messagebox.showinfo("Info", "Aucun rendez-vous trouvé pour ce patient.")
-            return
-
-        def submit() -> None:
-            appointment_id = appointment_var.get()
-            date = entry_date.get()
-            time = entry_time.get()
-            patient_name = entry_patient_name.get()
-            gender = gender_var.get()
-            age = entry_age.get()
-            consultation_reason = reason_var.get()
-            doctor_name = entry_doctor_name.get()
-            doctor_specialty = specialty_var.get()
-            
-            modify_appointment(appointment_id, date, time, patient_name, gender, int(age), consultation_reason, doctor_name, doctor_specialty)
-            messagebox.showinfo("Succès", "Rendez-vous modifié avec succès")
-
-        window = tk.Tk()
-        window.title("Modifier un rendez-vous")
-        window.geometry('400x500')
-        window.config(bg='lightgreen')
+    open_view('modify', "Modifier un rendez-vous", '900x500', 'lightgreen', build_modify_view)
 
-        center_window(window)
-
-        form_frame = tk.Frame(window, bg='green')
-        form_frame.pack(expand=True)
-
-        tk.Label(form_frame, text="Rendez-vous ID", bg='green', fg='white', font=('Arial', 10, 'bold')).grid(row=0, column=0, pady=5, padx=5, sticky='w')
-        tk.Label(form_frame, text="Date (YYYY-MM-DD)", bg='green', fg='white', font=('Arial', 10, 'bold')).grid(row=1, column=0, pady=5, padx=5, sticky='w')
-        tk.Label(form_frame, text="Heure (HH:MM)", bg='green', fg='white', font=('Arial', 10, 'bold')).grid(row=2, column=0, pady=5, padx=5, sticky='w')
-        tk.Label(form_frame, text="Nom du patient", bg='green', fg='white', font=('Arial', 10, 'bold')).grid(row=3, column=0, pady=5, padx=5, sticky='w')
-        tk.Label(form_frame, text="Genre", bg='green', fg='white', font=('Arial', 10, 'bold')).grid(row=4, column=0, pady=5, padx=5, sticky='w')
-        tk.Label(form_frame, text="Âge", bg='green', fg='white', font=('Arial', 10, 'bold')).grid(row=5, column=0, pady=5, padx=5, sticky='w')
-        tk.Label(form_frame, text="Raison de consultation", bg='green', fg='white', font=('Arial', 10, 'bold')).grid(row=6, column=0, pady=5, padx=5, sticky='w')
-        tk.Label(form_frame, text="Nom du médecin", bg='green', fg='white', font=('Arial', 10, 'bold')).grid(row=7, column=0, pady=5, padx=5, sticky='w')
-        tk.Label(form_frame, text="Spécialité du médecin", bg='green', fg='white', font=('Arial', 10, 'bold')).grid(row=8, column=0, pady=5, padx=5, sticky='w')
-
-        appointment_var = tk.IntVar()
-        appointment_menu = ttk.Combobox(form_frame, textvariable=appointment_var, values=[appointment[0] for appointment in appointments], width=28)
-        appointment_menu.grid(row=0, column=1, pady=5, padx=5)
-
-        entry_date = DateEntry(form_frame, width=28, background='darkblue', foreground='white', borderwidth=2)
-        entry_time = tk.Entry(form_frame, width=30)
-        entry_patient_name = tk.Entry(form_frame, width=30)
-        gender_var = tk.StringVar(value='Homme')
-        entry_age = tk.Entry(form_frame, width=30)
-        reason_var = tk.StringVar(value='MALADE')
-        entry_doctor_name = tk.Entry(form_frame, width=30)
-        specialty_var = tk.StringVar(value='GENICOLOGUE')
-        
-        entry_date.grid(row=1, column=1, pady=5, padx=5)
-        entry_time.grid(row=2, column=1, pady=5, padx=5)
-        entry_patient_name.grid(row=3, column=1, pady=5, padx=5)
-        
-        gender_menu = ttk.Combobox(form_frame, textvariable=gender_var, values=['Homme', 'Femme'], width=28)
-        gender_menu.grid(row=4, column=1, pady=5, padx=5)
-        
-        entry_age.grid(row=5, column=1, pady=5, padx=5)
-        
-        reason_menu = ttk.Combobox(form_frame, textvariable=reason_var, values=['MALADE', 'MAUX DE TETE', 'CANCERS'], width=28)
-        reason_menu.grid(row=6, column=1, pady=5, padx=5)
-        
-        entry_doctor_name.grid(row=7, column=1, pady=5, padx=5)
-        
-        specialty_menu = ttk.Combobox(form_frame, textvariable=specialty_var, values=['GENICOLOGUE', 'GENERALISTE', 'MEDECIN'], width=28)
-        specialty_menu.grid(row=8, column=1, pady=5, padx=5)
-
-        tk.Button(form_frame, text="Soumettre", command=submit, bg='blue', fg='white').grid(row=9, column=0, columnspan=2, pady=10)
-        
-        window.mainloop()
-
-def search_appointments_gui() -> None:
-    def search_by_patient() -> None:
-        patient_name = CustomStringDialog("Entrée", "Entrez le nom du patient à rechercher").result
-        if patient_name:
-            appointments = search_appointments_by_patient(patient_name)
-            show_search_results(appointments)
-
-    def search_by_doctor() -> None:
-        doctor_name = CustomStringDialog("Entrée", "Entrez le nom du médecin à rechercher").result
-        if doctor_name:
-            appointments = search_appointments_by_doctor(doctor_name)
-            show_search_results(appointments)
-
-    window = tk.Tk()
-    window.title("Rechercher des Rendez-vous")
-    window.geometry('400x300')
-    window.config(bg='lightgreen')
-
-    center_window(window)
+def build_modify_view(window: tk.Toplevel) -> None:
+    def modify_selected_appointment() -> None:
+        appointment = search.selected()
+        if appointment is None:
+            messagebox.showwarning("Avertissement", "Veuillez sélectionner un rendez-vous à modifier.")
+            return
+        show_modify_form([appointment])
 
-    tk.Button(window, text="Rechercher par nom de patient", command=search_by_patient, bg='white').pack(pady=10)
-    tk.Button(window, text="Rechercher par nom de médecin", command=search_by_doctor, bg='white').pack(pady=10)
+    tk.Label(window, text="Entrez le nom du patient pour modifier ses rendez-vous", bg='lightgreen').pack(pady=10)
+    search = LiveSearch(window, targets=('patients',))
+    search.pack(fill=tk.BOTH, expand=True, padx=10)
+    tk.Button(window, text="Modifier", command=modify_selected_appointment, bg='blue', fg='white').pack(pady=10)
 
-    window.mainloop()
+def show_modify_form(appointments: List[Tuple]) -> None:
+    if not appointments:
+        messagebox.showinfo("Info", "Aucun rendez-vous trouvé pour ce patient.")
+        return
+    window = open_view('modify-form', "Modifier un rendez-vous", '400x500', 'lightgreen', build_modify_form)
+    window.set_appointments(appointments)
 
-def show_search_results(appointments: List[Tuple]) -> None:
-    window = tk.Tk()
-    window.title("Résultats de la Recherche")
-    window.geometry('900x200')
-    window.config(bg='white')  # Set the background color to light green
+def build_modify_form(window: tk.Toplevel) -> None:
+    def set_appointments(appointments: List[Tuple]) -> None:
+        appointment_menu.config(values=[appointment[0] for appointment in appointments])
+        appointment_var.set(appointments[0][0])
 
-    center_window(window)
-
-    # Creating headers
-    headers = ["ID", "Date", "Heure", "Nom du patient", "Genre", "Âge", "Raison de consultation", "Nom du docteur", "Spécialité du docteur"]
+    def submit() -> None:
+        appointment_id = appointment_var.get()
+        date = entry_date.get()
+        time = entry_time.get()
+        patient_name = entry_patient_name.get()
+        gender = gender_var.get()
+        age = entry_age.get()
+        consultation_reason = reason_var.get()
+        doctor_name = entry_doctor_name.get()
+        doctor_specialty = specialty_var.get()
 
-    # Adding headers in a horizontal layout
-    for col, header in enumerate(headers):
-        tk.Label(window, text=header, font=("Arial", 10, "bold"), bg='white').grid(row=0, column=col, padx=10, pady=5, sticky='w')
+        def save(values: Tuple, allow_conflict: bool) -> None:
+            db_executor.submit(conflict_checked(backend.modify_appointment, allow_conflict), appointment_id, *values,
+                               on_done=lambda result: show_save_result(result, "Rendez-vous modifié avec succès",
+                                                                        "Le rendez-vous n'a pas pu être modifié (supprimé ou archivé entre-temps ?)."))
 
-    # Adding appointment details
-    for idx, appointment in enumerate(appointments):
-        for col, value in enumerate(appointment):
-            tk.Label(window, text=value, font=("Arial", 10, "italic"), bg='white').grid(row=idx + 1, column=col, padx=10, pady=5, sticky='w')
+        check_appointment_fields(date, time, patient_name, gender, age, consultation_reason, doctor_name, doctor_specialty, save, appointment_id)
 
-    window.mainloop()
+    form_frame = tk.Frame(window, bg='green')
+    form_frame.pack(expand=True)
 
-class CustomStringDialog(simpledialog.Dialog):
-    def __init__(self, title: str, prompt: str) -> None:
-        self.prompt = prompt
-        super().__init__(parent=None, title=title)
+    tk.Label(form_frame, text="Rendez-vous ID", bg='green', fg='white', font=('Arial', 10, 'bold')).grid(row=0, column=0, pady=5, padx=5, sticky='w')
+    tk.Label(form_frame, text="Date (YYYY-MM-DD)", bg='green', fg='white', font=('Arial', 10, 'bold')).grid(row=1, column=0, pady=5, padx=5, sticky='w')
+    tk.Label(form_frame, text="Heure (HH:MM)", bg='green', fg='white', font=('Arial', 10, 'bold')).grid(row=2, column=0, pady=5, padx=5, sticky='w')
+    tk.Label(form_frame, text="Nom du patient", bg='green', fg='white', font=('Arial', 10, 'bold')).grid(row=3, column=0, pady=5, padx=5, sticky='w')
+    tk.Label(form_frame, text="Genre", bg='green', fg='white', font=('Arial', 10, 'bold')).grid(row=4, column=0, pady=5, padx=5, sticky='w')
+    tk.Label(form_frame, text="Âge", bg='green', fg='white', font=('Arial', 10, 'bold')).grid(row=5, column=0, pady=5, padx=5, sticky='w')
+    tk.Label(form_frame, text="Raison de consultation", bg='green', fg='white', font=('Arial', 10, 'bold')).grid(row=6, column=0, pady=5, padx=5, sticky='w')
+    tk.Label(form_frame, text="Nom du médecin", bg='green', fg='white', font=('Arial', 10, 'bold')).grid(row=7, column=0, pady=5, padx=5, sticky='w')
+    tk.Label(form_frame, text="Spécialité du médecin", bg='green', fg='white', font=('Arial', 10, 'bold')).grid(row=8, column=0, pady=5, padx=5, sticky='w')
+
+    appointment_var = tk.IntVar()
+    appointment_menu = ttk.Combobox(form_frame, textvariable=appointment_var, width=28)
+    appointment_menu.grid(row=0, column=1, pady=5, padx=5)
+    # Le formulaire est réutilisé d'une sélection à l'autre : show_modify_form lui passe les rendez-vous à proposer
+    window.set_appointments = set_appointments
+
+    entry_date = DateEntry(form_frame, width=28, background='darkblue', foreground='white', borderwidth=2, date_pattern='yyyy-mm-dd')
+    entry_time = tk.Entry(form_frame, width=30)
+    entry_patient_name = tk.Entry(form_frame, width=30)
+    gender_var = tk.StringVar(value='Homme')
+    entry_age = tk.Entry(form_frame, width=30)
+    reason_var = tk.StringVar(value='MALADE')
+    entry_doctor_name = tk.Entry(form_frame, width=30)
+    specialty_var = tk.StringVar(value='GENICOLOGUE')
+    
+    entry_date.grid(row=1, column=1, pady=5, padx=5)
+    entry_time.grid(row=2, column=1, pady=5, padx=5)
+    entry_patient_name.grid(row=3, column=1, pady=5, padx=5)
+    
+    gender_menu = ttk.Combobox(form_frame, textvariable=gender_var, values=['Homme', 'Femme'], width=28)
+    gender_menu.grid(row=4, column=1, pady=5, padx=5)
+    
+    entry_age.grid(row=5, column=1, pady=5, padx=5)
+    
+    reason_menu = ttk.Combobox(form_frame, textvariable=reason_var, values=['MALADE', 'MAUX DE TETE', 'CANCERS'], width=28)
+    reason_menu.grid(row=6, column=1, pady=5, padx=5)
+    
+    entry_doctor_name.grid(row=7, column=1, pady=5, padx=5)
+    
+    specialty_menu = ttk.Combobox(form_frame, textvariable=specialty_var, values=['GENICOLOGUE', 'GENERALISTE', 'MEDECIN'], width=28)
+    specialty_menu.grid(row=8, column=1, pady=5, padx=5)
 
-    def body(self, master: tk.Frame) -> tk.Widget:
-        self.configure(bg='lightgreen')
-        tk.Label(master, text=self.prompt, bg='lightgreen').pack(pady=10)
-        self.entry = tk.Entry(master, width=40)
-        self.entry.pack(pady=10)
-        return self.entry
+    tk.Button(form_frame, text="Soumettre", command=submit, bg='blue', fg='white').grid(row=9, column=0, columnspan=2, pady=10)
 
-    def apply(self) -> None:
-        self.result = self.entry.get()
+def search_appointments_gui() -> None:
+    open_view('search', "Rechercher des Rendez-vous", '900x500', 'lightgreen', build_search_view)
+
+def build_search_view(window: tk.Toplevel) -> None:
+    LiveSearch(window).pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+# Onglets de la fenêtre de statistiques : (clé renvoyée par appointment_statistics, titre, en-têtes des colonnes)
+STATISTICS_TABS = (
+    ('days', "Par jour", ("Date", "Rendez-vous")),
+    ('doctors', "Par médecin", ("Nom du docteur", "Spécialité du docteur", "Rendez-vous")),
+    ('specialties', "Par spécialité", ("Spécialité du docteur", "Rendez-vous")),
+    ('reasons', "Par motif", ("Raison de consultation", "Rendez-vous")),
+)
+
+def statistics_gui() -> None:
+    open_view('statistics', "Statistiques des Rendez-vous", '600x500', 'lightgreen', build_statistics_view)
+
+def build_statistics_view(window: tk.Toplevel) -> None:
+    def refresh() -> None:
+        db_executor.submit(backend.appointment_statistics, on_done=show_statistics, key='statistics')
+
+    def show_statistics(statistics: Dict[str, List[Tuple]]) -> None:
+        for key, tree in trees.items():
+            tree.delete(*tree.get_children())
+            for row in statistics[key]:
+                tree.insert('', tk.END, values=row)
+
+    tk.Label(window, text="Jours : un mois avant et après aujourd'hui. Autres onglets : depuis le début.", bg='lightgreen').pack(pady=5)
+    notebook = ttk.Notebook(window)
+    notebook.pack(fill=tk.BOTH, expand=True, padx=10)
+    trees: Dict[str, ttk.Treeview] = {}
+    for key, title, headers in STATISTICS_TABS:
+        tree = ttk.Treeview(notebook, columns=headers, show='headings')
+        for header in headers:
+            tree.heading(header, text=header)
+        notebook.add(tree, text=title)
+        trees[key] = tree
+    tk.Button(window, text="Actualiser", command=refresh, bg='white').pack(pady=10)
+    # Les comptes sont relus à chaque changement tant que l'écran est affiché (la lecture des tables de synthèse
+    # ne coûte presque rien), et à chaque réaffichage
+    change_watcher.watch(notebook, lambda changes: notebook.winfo_viewable() and refresh())
+    window.bind('<Map>', lambda event: event.widget is window and refresh())
 
 def main_gui() -> None:
-    window = tk.Tk()
+    global main_window
+    # Charger l'image de fond et le logo pendant que la fenêtre se construit
+    bg_image_path = r"background.png"
+    logo_image_path = r"logo_circle1.png"  # Mettez le chemin correct ici
+    assets = preload_assets([(bg_image_path, (2000, 800)), (logo_image_path, (80, 80))])
+
+    window = main_window = tk.Tk()
     window.title("Gestionnaire des Rendez-vous du Clinic")
     window.geometry('700x800')
 
@@ -434,50 +860,61 @@ def main_gui() -> None:
     canvas = tk.Canvas(window, width=700, height=800)
     canvas.pack(fill="both", expand=True)
 
-    # Charger l'image de fond
-    bg_image_path = r"background.png"
-    if os.path.exists(bg_image_path):
-        bg_image = Image.open(bg_image_path)
-        bg_image = bg_image.resize((2000, 800), Image.LANCZOS)
-        bg_photo = ImageTk.PhotoImage(bg_image)
-        canvas.create_image(0, 0, image=bg_photo, anchor="nw")
-    else:
-        messagebox.showwarning("Avertissement", "Image de fond non trouvée.")
-
-    # Charger le logo
-    logo_image_path = r"logo_circle1.png"  # Mettez le chemin correct ici
-    if os.path.exists(logo_image_path):
-        logo_image = Image.open(logo_image_path)
-        logo_image = logo_image.resize((80, 80), Image.LANCZOS)
-        logo_photo = ImageTk.PhotoImage(logo_image)
-    else:
-        logo_photo = None
-        messagebox.showwarning("Avertissement", "Logo non trouvé.")
-
     # Ajouter les widgets sur le canevas
     top_bar = tk.Frame(canvas, bg='green', height=100, width=500)
     top_bar.pack(fill=tk.X)
 
-    if logo_photo:
-        logo_label = tk.Label(top_bar, image=logo_photo, bg='green')
-        logo_label.pack(side=tk.LEFT, padx=10)
-        logo_label.image = logo_photo  # Pour s'assurer que l'image reste affichée
+    # Le logo est posé une fois l'image prête, à la fin de la construction de la fenêtre
+    logo_label = tk.Label(top_bar, bg='green')
+    logo_label.pack(side=tk.LEFT, padx=10)
 
     tk.Label(top_bar, text="Gestionnaire des Rendez-vous du Clinic", font=("Arial", 30), fg="white", bg="green", anchor="center").pack(pady=20)
 
+    # Indicateur affiché tant que le thread de base de données a du travail en attente
+    busy_label = tk.Label(top_bar, text="", fg="white", bg="green", font=("Arial", 10, "italic"))
+    busy_label.place(relx=1.0, rely=1.0, anchor='se', x=-10, y=-5)
+
+    def show_busy(busy: bool) -> None:
+        busy_label.config(text="Traitement en cours..." if busy else "")
+        window.config(cursor='watch' if busy else '')
+
+    db_executor.add_busy_listener(show_busy)
+    db_executor.start(window)
+    change_watcher.start(window)
+
     sidebar = tk.Frame(canvas, bg='lightgreen', height=500, width=200)
     sidebar.pack(fill=tk.Y, side=tk.LEFT, pady=5)
 
     # Adapter les boutons avec padx pour l'espacement à gauche
-    tk.Button(sidebar, text="AJOUTER", command=add_appointment_gui, bg='white').pack(pady=20, padx=60)
-    tk.Button(sidebar, text="SUPPRIMER", command=delete_appointment_gui, bg='white').pack(pady=20, padx=60)
-    tk.Button(sidebar, text="MODIFIER", command=modify_appointment_gui, bg='white').pack(pady=20, padx=60)
-    tk.Button(sidebar, text="AFFICHER", command=display_appointments_gui, bg='white').pack(pady=20, padx=60)
-    tk.Button(sidebar, text="Rechercher des rendez-vous", command=search_appointments_gui, bg='white').pack(pady=20, padx=20)
-    
+    tk.Button(sidebar, text="AJOUTER", command=profiled(add_appointment_gui), bg='white').pack(pady=20, padx=60)
+    tk.Button(sidebar, text="IMPORTER", command=profiled(import_appointments_gui), bg='white').pack(pady=20, padx=60)
+    tk.Button(sidebar, text="SUPPRIMER", command=profiled(delete_appointment_gui), bg='white').pack(pady=20, padx=60)
+    tk.Button(sidebar, text="MODIFIER", command=profiled(modify_appointment_gui), bg='white').pack(pady=20, padx=60)
+    tk.Button(sidebar, text="AFFICHER", command=profiled(display_appointments_gui), bg='white').pack(pady=20, padx=60)
+    tk.Button(sidebar, text="Rechercher des rendez-vous", command=profiled(search_appointments_gui), bg='white').pack(pady=20, padx=20)
+    tk.Button(sidebar, text="STATISTIQUES", command=profiled(statistics_gui), bg='white').pack(pady=20, padx=60)
+
+    bg_photo = load_photo(assets, bg_image_path)
+    if bg_photo:
+        canvas.create_image(0, 0, image=bg_photo, anchor="nw")
+        canvas.bg_photo = bg_photo  # Pour s'assurer que l'image reste affichée
+    else:
+        messagebox.showwarning("Avertissement", "Image de fond non trouvée.")
+
+    logo_photo = load_photo(assets, logo_image_path)
+    if logo_photo:
+        logo_label.config(image=logo_photo)
+        logo_label.image = logo_photo  # Pour s'assurer que l'image reste affichée
+    else:
+        logo_label.pack_forget()
+        messagebox.showwarning("Avertissement", "Logo non trouvé.")
 
     window.mainloop()
+    # Les écrans ont été détruits avec la fenêtre principale
+    views.clear()
+    db_executor.shutdown()
 
 if __name__ == '__main__':
-    create_database_and_table()
-    main_gui()
+    # Lancé directement, le script ouvre l'interface comme avant ; les autres commandes passent par rendezvous_cli.py
+    import rendezvous_cli
+    sys.exit(rendezvous_cli.main(sys.argv[1:], default_command='gui'))
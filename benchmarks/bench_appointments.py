@@ -0,0 +1,216 @@
+# Banc d'essai du cœur de données : génère une clinique synthétique puis mesure les fonctions publiques.
+#
+#   python benchmarks/bench_appointments.py --sizes 10000 1000000 --output bench_results.json
+#   python benchmarks/bench_appointments.py --sizes 10000 --compare ancien.json
+#
+# Les bases générées sont conservées dans --db-dir et réutilisées d'une exécution à l'autre.
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import rendezvous_core as core  # noqa: E402
+
+FIRST_NAMES = ('Jean', 'Marie', 'Awa', 'Moussa', 'Fatou', 'Paul', 'Aminata', 'Ousmane', 'Claire', 'Ibrahim',
+               'Sophie', 'Adama', 'Lucie', 'Issa', 'Mariam', 'Pierre', 'Salif', 'Rose', 'Boureima', 'Julie')
+SYLLABLES = ('ka', 'gam', 'be', 'ga', 'ou', 'dra', 'sa', 'wa', 'do', 'go', 'ti', 'lem', 'ba', 'ko', 'ra', 'zi',
+             'mo', 'nde', 'fa', 'ye')
+SPECIALTIES = ('GENERALISTE', 'GENICOLOGUE', 'MEDECIN', 'PEDIATRE', 'CARDIOLOGUE', 'DERMATOLOGUE')
+REASONS = ('MALADE', 'MAUX DE TETE', 'CONTROLE', 'VACCIN', 'CANCERS', 'URGENCE')
+# Les motifs et spécialités les plus courants viennent en premier
+REASON_WEIGHTS = (40, 20, 20, 10, 5, 5)
+DOCTOR_COUNT = 200
+HISTORY_YEARS = 10
+GENERATION_BATCH = 50000
+
+def patient(index: int) -> Tuple[str, str, int]:
+    # Nom déterministe tiré de l'index : aucun registre des patients à garder en mémoire
+    surname = ''.join(SYLLABLES[(index // 20 ** power) % 20] for power in range(1, 4)).upper()
+    return f'{surname} {FIRST_NAMES[index % 20]}', ('Femme' if index % 2 else 'Homme'), 1 + index % 90
+
+def doctor(index: int) -> Tuple[str, str]:
+    return f'Dr {SYLLABLES[index % 20].upper()}{SYLLABLES[(index // 20) % 20]} {index}', SPECIALTIES[index % len(SPECIALTIES)]
+
+def skewed(count: int, rng: random.Random, exponent: float) -> int:
+    # Distribution fortement asymétrique : quelques patients et médecins concentrent la plupart des rendez-vous
+    return min(int(count * rng.random() ** exponent), count - 1)
+
+def synthetic_appointments(size: int, seed: int) -> Iterator[Tuple]:
+    rng = random.Random(seed)
+    patient_count = max(size // 5, 1)
+    first_day = date.today() - timedelta(days=365 * HISTORY_YEARS)
+    for _ in range(size):
+        patient_name, gender, age = patient(skewed(patient_count, rng, 3.0))
+        doctor_name, doctor_specialty = doctor(skewed(DOCTOR_COUNT, rng, 2.0))
+        day = first_day + timedelta(days=rng.randrange(365 * HISTORY_YEARS + 60))
+        slot = rng.randrange(20)
+        time_of_day = '%02d:%02d' % (8 + slot // 2, 30 * (slot % 2))
+        reason = rng.choices(REASONS, REASON_WEIGHTS)[0]
+        yield (day.isoformat(), time_of_day, patient_name, gender, age, reason, doctor_name, doctor_specialty)
+
+def prepare_database(size: int, db_dir: str, seed: int) -> float:
+    core.close_connections()
+    core.database_path = os.path.join(db_dir, f'bench_{size}_{seed}.sqlite')
+    core.create_database_and_table()
+    existing = core.get_connection().execute('SELECT COUNT(*) FROM appointments').fetchone()[0]
+    if existing == size:
+        return 0.0
+    if existing:
+        core.close_connections()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(core.database_path + suffix):
+                os.remove(core.database_path + suffix)
+        core.create_database_and_table()
+
+    started = time.perf_counter()
+    batch: List[Tuple[int, Tuple]] = []
+    rejects: List[Tuple[int, str]] = []
+    for line_number, values in enumerate(synthetic_appointments(size, seed), 1):
+        batch.append((line_number, values))
+        if len(batch) >= GENERATION_BATCH:
+            core._insert_batch(batch, rejects)
+            batch = []
+    if batch:
+        core._insert_batch(batch, rejects)
+    core.get_connection().execute('ANALYZE')
+    return time.perf_counter() - started
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+def measure(operation: Callable[[int], object], iterations: int, before: Optional[Callable[[], None]] = None) -> Dict:
+    # before() est appelé hors chronomètre avant chaque appel (ex. vider le cache des résultats)
+    latencies: List[float] = []
+    elapsed = 0.0
+    for iteration in range(iterations):
+        if before is not None:
+            before()
+        call_started = time.perf_counter()
+        operation(iteration)
+        latencies.append((time.perf_counter() - call_started) * 1000)
+        elapsed += latencies[-1] / 1000
+    latencies.sort()
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(latencies, 0.50), 4),
+        'p95_ms': round(percentile(latencies, 0.95), 4),
+        'p99_ms': round(percentile(latencies, 0.99), 4),
+        'max_ms': round(latencies[-1], 4),
+        'ops_per_second': round(iterations / elapsed, 1) if elapsed else None,
+    }
+
+def run_size(size: int, args: argparse.Namespace) -> Dict:
+    generation_seconds = prepare_database(size, args.db_dir, args.seed)
+    rng = random.Random(args.seed + 1)
+    conn = core.get_connection()
+    max_id = conn.execute('SELECT MAX(id) FROM appointments').fetchone()[0]
+    patient_count = max(size // 5, 1)
+    # Recherches réalistes : un fragment du nom d'un patient ou d'un médecin existant
+    patient_terms = [patient(skewed(patient_count, rng, 3.0))[0].split()[0][:5] for _ in range(args.iterations)]
+    doctor_terms = [doctor(skewed(DOCTOR_COUNT, rng, 2.0))[0][3:8] for _ in range(args.iterations)]
+    existing_ids = [rng.randint(1, max_id) for _ in range(args.iterations)]
+    new_rows = list(synthetic_appointments(args.iterations, args.seed + 2))
+    added_ids: List[int] = []
+
+    def add(iteration: int) -> None:
+        added_ids.append(core.add_appointment(*new_rows[iteration]))
+
+    def modify(iteration: int) -> None:
+        core.modify_appointment(added_ids[iteration], *new_rows[-1 - iteration])
+
+    def delete(iteration: int) -> None:
+        core.delete_appointment(added_ids[iteration])
+
+    operations: Dict[str, Dict] = {}
+    operations['add_appointment'] = measure(add, args.iterations)
+    operations['modify_appointment'] = measure(modify, args.iterations)
+    operations['delete_appointment'] = measure(delete, args.iterations)
+    # Les termes tirés se répètent : sans vider le cache des résultats, on mesurerait surtout des succès de cache
+    searches = {
+        'search_appointments_by_patient': lambda i: core.search_appointments_by_patient(patient_terms[i]),
+        'search_appointments_by_doctor': lambda i: core.search_appointments_by_doctor(doctor_terms[i]),
+        'generate_receipt': lambda i: core.generate_receipt(existing_ids[i]),
+    }
+    for name, operation in searches.items():
+        operations[name] = measure(operation, args.iterations, before=core.result_cache.clear)
+    for name, operation in searches.items():
+        operations[name + '_cached'] = measure(operation, args.iterations)
+    operations['iter_appointments_first_page'] = measure(lambda i: list(zip(range(core.PAGE_SIZE), core.iter_appointments())), args.iterations)
+    if size <= args.max_display_rows:
+        operations['display_appointments'] = measure(lambda i: core.display_appointments(), args.display_iterations)
+
+    result = {
+        'rows': size,
+        'generation_seconds': round(generation_seconds, 2),
+        'database_bytes': os.path.getsize(core.database_path),
+        'operations': operations,
+    }
+    core.close_connections()
+    return result
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_report(results: Dict, baseline: Optional[Dict]) -> None:
+    for size, size_result in results['sizes'].items():
+        print(f"\n{size_result['rows']} rendez-vous ({size_result['database_bytes'] / 1e6:.1f} Mo)")
+        print(f"{'opération':<40}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>12}{'p50 vs réf.':>14}")
+        for name, stats in size_result['operations'].items():
+            comparison = ''
+            if baseline:
+                reference = baseline.get('sizes', {}).get(size, {}).get('operations', {}).get(name)
+                if reference and reference['p50_ms']:
+                    comparison = f"{stats['p50_ms'] / reference['p50_ms']:.2f}x"
+            print(f"{name:<40}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}"
+                  f"{stats['ops_per_second'] or 0:>12.1f}{comparison:>14}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Banc d'essai du gestionnaire de rendez-vous")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000], help="tailles de jeux de données (ex. 10000 1000000 10000000)")
+    parser.add_argument('--iterations', type=int, default=200, help="appels mesurés par opération")
+    parser.add_argument('--display-iterations', type=int, default=3, help="appels mesurés pour display_appointments")
+    parser.add_argument('--max-display-rows', type=int, default=1000000, help="taille au-delà de laquelle display_appointments n'est pas mesurée")
+    parser.add_argument('--db-dir', default=os.path.join(tempfile.gettempdir(), 'rendezvous_bench'), help="dossier des bases générées")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='bench_results.json', help="fichier JSON des résultats")
+    parser.add_argument('--compare', help="résultats JSON d'une version précédente à comparer")
+    args = parser.parse_args()
+
+    os.makedirs(args.db_dir, exist_ok=True)
+    results = {
+        'revision': git_revision(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'iterations': args.iterations,
+        # Recherches et reçus : cache vidé avant chaque appel ; les variantes *_cached le laissent actif
+        'result_cache': 'cleared_per_call',
+        'sizes': {str(size): run_size(size, args) for size in args.sizes},
+    }
+    with open(args.output, 'w', encoding='utf-8') as output_file:
+        json.dump(results, output_file, indent=2, ensure_ascii=False)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+    print_report(results, baseline)
+    print(f"\nRésultats enregistrés dans {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+# Ligne de commande du gestionnaire de rendez-vous : sorties JSON, sans interface graphique.
+# Tk, PIL et tkcalendar ne sont chargés que par la commande « gui ».
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+
+import rendezvous_core as core
+import rendezvous_metrics as metrics
+
+GUI_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Gestion de rendez-vous medicals.py')
+
+def appointment_to_dict(appointment: Tuple) -> Dict:
+    return dict(zip(core.APPOINTMENT_COLUMNS, appointment))
+
+def print_json(value) -> None:
+    json.dump(value, sys.stdout, ensure_ascii=False)
+    sys.stdout.write('\n')
+
+def command_add(args: argparse.Namespace) -> int:
+    fields = {field: getattr(args, field) for field in core.IMPORT_FIELDS}
+    try:
+        values = core.validate_appointment(fields)
+    except ValueError as err:
+        print_json({'error': str(err)})
+        return 1
+    date, time, patient_name, gender, age, consultation_reason, doctor_name, doctor_specialty = values
+    if not args.allow_conflict:
+        conflict_id = core.find_conflict(doctor_name, date, time)
+        if conflict_id is not None:
+            print_json({'error': "créneau déjà occupé", 'conflict_id': conflict_id})
+            return 1
+    appointment_id = core.add_appointment(*values)
+    if appointment_id is None:
+        print_json({'error': "échec de l'ajout"})
+        return 1
+    print_json({'id': appointment_id})
+    return 0
+
+def command_search(args: argparse.Namespace) -> int:
+    if args.doctor:
+        appointments = core.search_appointments_by_doctor(args.doctor, args.date_from, args.date_to)
+    else:
+        appointments = core.search_appointments_by_patient(args.patient, args.date_from, args.date_to)
+    print_json([appointment_to_dict(appointment) for appointment in appointments[:args.limit]])
+    return 0
+
+def command_list(args: argparse.Namespace) -> int:
+    # Le tableau JSON est écrit au fil de l'eau : la mémoire reste bornée par la taille d'une page
+    appointments = core.iter_appointments(args.order_by, args.descending, args.date_from, args.date_to,
+                                          args.doctor, args.specialty)
+    sys.stdout.write('[')
+    try:
+        for position, appointment in enumerate(appointments):
+            if args.limit is not None and position >= args.limit:
+                break
+            sys.stdout.write(', ' if position else '')
+            json.dump(appointment_to_dict(appointment), sys.stdout, ensure_ascii=False)
+    except sqlite3.Error as err:
+        # Tableau laissé ouvert : une sortie tronquée ne doit pas se lire comme une liste complète
+        sys.stdout.write('\n')
+        print(f"Erreur lors du chargement des rendez-vous: {err}", file=sys.stderr)
+        return 1
+    sys.stdout.write(']\n')
+    return 0
+
+def command_export(args: argparse.Namespace) -> int:
+    exported = core.export_appointments(args.file, order_by=args.order_by, descending=args.descending, date_from=args.date_from,
+                                        date_to=args.date_to, doctor_name=args.doctor, doctor_specialty=args.specialty)
+    if exported is None:
+        print_json({'error': "échec de l'export", 'file': args.file})
+        return 1
+    print_json({'exported': exported, 'file': args.file})
+    return 0
+
+def command_delete(args: argparse.Namespace) -> int:
+    core.delete_appointment(args.id)
+    print_json({'deleted': args.id})
+    return 0
+
+def command_receipt(args: argparse.Namespace) -> int:
+    print_json({'id': args.id, 'receipt': core.generate_receipt(args.id)})
+    return 0
+
+def command_archive(args: argparse.Namespace) -> int:
+    moved = core.archive_appointments(args.horizon_days, vacuum=not args.no_vacuum)
+    print_json({'archived': {str(year): count for year, count in moved.items()},
+                'archives': [core.archive_path(year) for year in core.archive_years()]})
+    return 0
+
+def command_stats(args: argparse.Namespace) -> int:
+    statistics = core.appointment_statistics(args.date_from, args.date_to)
+    print_json({
+        'days': [{'date': day, 'appointments': count} for day, count in statistics['days']],
+        'doctors': [{'doctor_name': name, 'doctor_specialty': specialty, 'appointments': count}
+                    for name, specialty, count in statistics['doctors']],
+        'specialties': [{'doctor_specialty': specialty, 'appointments': count} for specialty, count in statistics['specialties']],
+        'reasons': [{'consultation_reason': reason, 'appointments': count} for reason, count in statistics['reasons']],
+    })
+    return 0
+
+def command_import(args: argparse.Namespace) -> int:
+    started = perf_counter()
+    try:
+        imported, rejects = core.import_appointments(args.file, args.batch_size)
+    except (OSError, csv.Error, UnicodeDecodeError) as err:
+        print_json({'error': f"fichier illisible: {err}"})
+        return 1
+    elapsed = perf_counter() - started
+    print_json({
+        'imported': imported,
+        'rejected': [{'line': line_number, 'reason': reason} for line_number, reason in rejects],
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(imported / elapsed) if elapsed else None,
+    })
+    return 0
+
+def command_changes(args: argparse.Namespace) -> int:
+    if args.compact:
+        # Compactage explicite : les commandes ne compactent pas d'elles-mêmes (tâche planifiée, par exemple)
+        print_json({'compacted': core.compact_change_log(), 'position': core.change_log_position()})
+        return 0
+    if args.since is None:
+        print_json({'position': core.change_log_position()})
+        return 0
+    position, changes = core.changes_since(args.since, args.limit)
+    if changes is None:
+        # Journal compacté depuis cette position, ou trop de changements : refaire un export complet
+        print_json({'position': position, 'changes': None})
+        return 0
+    print_json({'position': position, 'changes': [{'id': appointment_id, 'appointment': appointment and appointment_to_dict(appointment)}
+                                                  for appointment_id, appointment in changes.items()]})
+    return 0
+
+def command_gui(args: argparse.Namespace) -> int:
+    main_module = sys.modules.get('__main__')
+    main_file = getattr(main_module, '__file__', None)
+    if main_file and os.path.abspath(main_file) == GUI_SCRIPT:
+        # Lancé depuis le script de l'interface : il est déjà chargé
+        gui = main_module
+    else:
+        import importlib.util
+
+        spec = importlib.util.spec_from_file_location('gestion_rendez_vous_gui', GUI_SCRIPT)
+        gui = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(gui)
+    if args.server:
+        gui.use_service(args.server)
+    gui.main_gui()
+    return 0
+
+def command_serve(args: argparse.Namespace) -> int:
+    # asyncio et le serveur HTTP ne sont chargés que pour cette commande
+    import rendezvous_server
+
+    rendezvous_server.serve(args.host, args.port)
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Gestionnaire des Rendez-vous du Clinic")
+    parser.add_argument('--db', default=core.database_path, help="chemin de la base SQLite")
+    parser.add_argument('--metrics-file', help="écrire les métriques d'accès aux données dans ce fichier JSON en sortie")
+    parser.add_argument('--slow-query-ms', type=float, default=metrics.SLOW_QUERY_MS, help="seuil du journal des requêtes lentes")
+    subparsers = parser.add_subparsers(dest='command')
+
+    add_parser = subparsers.add_parser('add', help="ajouter un rendez-vous")
+    for field in core.IMPORT_FIELDS:
+        add_parser.add_argument(f"--{field.replace('_', '-')}", dest=field, required=True)
+    add_parser.add_argument('--allow-conflict', action='store_true', help="accepter un créneau déjà occupé")
+    add_parser.set_defaults(handler=command_add)
+
+    search_parser = subparsers.add_parser('search', help="rechercher par patient ou par médecin")
+    search_target = search_parser.add_mutually_exclusive_group(required=True)
+    search_target.add_argument('--patient')
+    search_target.add_argument('--doctor')
+    search_parser.add_argument('--date-from', help="inclut les archives à partir de cette date")
+    search_parser.add_argument('--date-to', help="inclut les archives jusqu'à cette date")
+    search_parser.add_argument('--limit', type=int, default=None)
+    search_parser.set_defaults(handler=command_search)
+
+    list_parser = subparsers.add_parser('list', help="lister les rendez-vous")
+    list_parser.add_argument('--order-by', default='date', choices=core.SORT_COLUMNS)
+    list_parser.add_argument('--descending', action='store_true')
+    list_parser.add_argument('--date-from')
+    list_parser.add_argument('--date-to')
+    list_parser.add_argument('--doctor')
+    list_parser.add_argument('--specialty')
+    list_parser.add_argument('--limit', type=int, default=None)
+    list_parser.set_defaults(handler=command_list)
+
+    export_parser = subparsers.add_parser('export', help="exporter les rendez-vous dans un fichier CSV (réimportable par « import »)")
+    export_parser.add_argument('file', help="fichier .csv à écrire")
+    export_parser.add_argument('--order-by', default='date', choices=core.SORT_COLUMNS)
+    export_parser.add_argument('--descending', action='store_true')
+    export_parser.add_argument('--date-from')
+    export_parser.add_argument('--date-to')
+    export_parser.add_argument('--doctor')
+    export_parser.add_argument('--specialty')
+    export_parser.set_defaults(handler=command_export)
+
+    delete_parser = subparsers.add_parser('delete', help="supprimer un rendez-vous")
+    delete_parser.add_argument('id', type=int)
+    delete_parser.set_defaults(handler=command_delete)
+
+    receipt_parser = subparsers.add_parser('receipt', help="générer le reçu d'un rendez-vous")
+    receipt_parser.add_argument('id', type=int)
+    receipt_parser.set_defaults(handler=command_receipt)
+
+    archive_parser = subparsers.add_parser('archive', help="déplacer les anciens rendez-vous dans des archives annuelles")
+    archive_parser.add_argument('--horizon-days', type=int, default=core.ARCHIVE_HORIZON_DAYS,
+                                help="âge en jours au-delà duquel un rendez-vous est archivé")
+    archive_parser.add_argument('--no-vacuum', action='store_true', help="ne pas compacter la base principale ensuite")
+    archive_parser.set_defaults(handler=command_archive)
+
+    stats_parser = subparsers.add_parser('stats', help="nombre de rendez-vous par jour, médecin, spécialité et motif")
+    stats_parser.add_argument('--date-from')
+    stats_parser.add_argument('--date-to')
+    stats_parser.set_defaults(handler=command_stats)
+
+    import_parser = subparsers.add_parser('import', help="importer des rendez-vous depuis un fichier CSV ou JSONL")
+    import_parser.add_argument('file', help="fichier .csv ou .jsonl à importer")
+    import_parser.add_argument('--batch-size', type=int, default=core.IMPORT_BATCH_SIZE, help="lignes par transaction")
+    import_parser.set_defaults(handler=command_import)
+
+    changes_parser = subparsers.add_parser('changes', help="rendez-vous ajoutés, modifiés ou supprimés depuis une position du journal")
+    changes_parser.add_argument('--since', type=int, help="position renvoyée par l'appel précédent (sans : position actuelle)")
+    changes_parser.add_argument('--limit', type=int, default=core.CHANGES_LIMIT, help="au-delà, un export complet est demandé")
+    changes_parser.add_argument('--compact', action='store_true',
+                                help=f"supprimer les entrées de plus de {core.CHANGE_LOG_RETENTION_DAYS} jours")
+    changes_parser.set_defaults(handler=command_changes)
+
+    gui_parser = subparsers.add_parser('gui', help="ouvrir l'interface graphique")
+    gui_parser.add_argument('--server', default=os.environ.get('RENDEZVOUS_SERVER'),
+                            help="URL d'un service lancé par « serve » (ex. http://127.0.0.1:8765) au lieu de la base locale")
+    gui_parser.set_defaults(handler=command_gui)
+
+    serve_parser = subparsers.add_parser('serve', help="partager la base à travers un service HTTP/JSON local")
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8765)
+    serve_parser.set_defaults(handler=command_serve)
+    return parser
+
+def main(argv: Optional[List[str]] = None, default_command: Optional[str] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        if default_command is None:
+            parser.print_help()
+            return 2
+        args = parser.parse_args((argv or []) + [default_command])
+
+    core.database_path = args.db
+    # Seuls l'interface et le service vivent assez longtemps pour compacter le journal au fil des écritures
+    core.auto_compact_change_log = args.command in ('gui', 'serve')
+    metrics.SLOW_QUERY_MS = args.slow_query_ms
+    metrics.configure_from_environment()
+    if not getattr(args, 'server', None):
+        # Client d'un service : la base locale n'est pas touchée
+        core.create_database_and_table()
+    try:
+        return args.handler(args)
+    finally:
+        core.close_connections()
+        if args.metrics_file:
+            metrics.write_metrics(args.metrics_file)
+
+if __name__ == '__main__':
+    sys.exit(main())
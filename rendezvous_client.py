@@ -0,0 +1,172 @@
+# Client du service HTTP (rendezvous_server.py) : mêmes noms et mêmes valeurs de retour que les fonctions
+# de rendezvous_core utilisées par l'interface, qui peut ainsi travailler sur une base partagée à distance.
+import http.client
+import json
+import threading
+import urllib.parse
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from rendezvous_core import APPOINTMENT_COLUMNS, CHANGES_LIMIT, LIVE_SEARCH_LIMIT, PAGE_SIZE, IMPORT_BATCH_SIZE, read_import_records
+
+REQUEST_TIMEOUT = 30
+# Taille maximale d'un envoi d'import, sous la limite du corps de requête du service (1 Mo)
+IMPORT_CHUNK_BYTES = 512 * 1024
+
+class ServiceError(Exception):
+    def __init__(self, status: int, message: str, details: Optional[Dict] = None) -> None:
+        super().__init__(message)
+        self.status = status
+        self.details = details or {}
+
+def _appointment(record: Dict) -> Tuple:
+    return tuple(record[column] for column in APPOINTMENT_COLUMNS)
+
+class ServiceBackend:
+    def __init__(self, url: str) -> None:
+        parts = urllib.parse.urlsplit(url)
+        self.url = url
+        self.host = parts.hostname or '127.0.0.1'
+        self.port = parts.port or 80
+        # Une connexion persistante par thread : le thread de l'interface et le thread de base ne la partagent pas
+        self._local = threading.local()
+        self._connections: List[http.client.HTTPConnection] = []
+        self._connections_lock = threading.Lock()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=REQUEST_TIMEOUT)
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _request(self, method: str, path: str, params: Optional[Dict] = None, body: Optional[Dict] = None) -> Dict:
+        query = {key: value for key, value in (params or {}).items() if value is not None}
+        target = path + ('?' + urllib.parse.urlencode(query) if query else '')
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        headers = {'Content-Type': 'application/json'} if data is not None else {}
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request(method, target, body=data, headers=headers)
+                response = conn.getresponse()
+                payload = json.loads(response.read() or b'{}')
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # Connexion persistante fermée par le serveur entre deux requêtes : une seule nouvelle tentative
+                conn.close()
+                if attempt:
+                    raise
+        if response.getheader('Connection', '').lower() == 'close':
+            conn.close()
+        if response.status >= 400:
+            details = {key: value for key, value in payload.items() if key != 'error'}
+            raise ServiceError(response.status, payload.get('error', response.reason), details)
+        return payload
+
+    def get_connection(self) -> None:
+        # Pas de connexion SQLite côté client : une requête en cours ne peut pas être interrompue
+        return None
+
+    def close_connections(self) -> None:
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def add_appointment(self, date: str, time: str, patient_name: str, gender: str, age: int, consultation_reason: str,
+                        doctor_name: str, doctor_specialty: str, allow_conflict: bool = False) -> Optional[int]:
+        return self._request('POST', '/appointments', body={
+            'date': date, 'time': time, 'patient_name': patient_name, 'gender': gender, 'age': age,
+            'consultation_reason': consultation_reason, 'doctor_name': doctor_name, 'doctor_specialty': doctor_specialty,
+            'allow_conflict': allow_conflict})['id']
+
+    def modify_appointment(self, appointment_id: int, date: str, time: str, patient_name: str, gender: str, age: int,
+                           consultation_reason: str, doctor_name: str, doctor_specialty: str, allow_conflict: bool = False) -> Optional[int]:
+        return self._request('PUT', f'/appointments/{appointment_id}', body={
+            'date': date, 'time': time, 'patient_name': patient_name, 'gender': gender, 'age': age,
+            'consultation_reason': consultation_reason, 'doctor_name': doctor_name, 'doctor_specialty': doctor_specialty,
+            'allow_conflict': allow_conflict})['id']
+
+    def delete_appointment(self, appointment_id: int) -> None:
+        self._request('DELETE', f'/appointments/{appointment_id}')
+
+    def iter_appointments(self, order_by: str = 'date', descending: bool = False, date_from: Optional[str] = None,
+                          date_to: Optional[str] = None, doctor_name: Optional[str] = None, doctor_specialty: Optional[str] = None,
+                          page_size: int = PAGE_SIZE) -> Iterator[Tuple]:
+        # Chaque page suivante renvoie la clé de la dernière ligne reçue : le serveur ne garde rien entre deux pages
+        params = {'order_by': order_by, 'descending': 'true' if descending else None, 'date_from': date_from, 'date_to': date_to,
+                  'doctor_name': doctor_name, 'doctor_specialty': doctor_specialty, 'limit': page_size}
+        while True:
+            page = self._request('GET', '/appointments', params)
+            for record in page['appointments']:
+                yield _appointment(record)
+            if page['after'] is None:
+                return
+            params['after'] = json.dumps(page['after'])
+
+    def search_appointments_by_patient(self, patient_name: str, date_from: Optional[str] = None, date_to: Optional[str] = None) -> List[Tuple]:
+        result = self._request('GET', '/search', {'patient': patient_name, 'date_from': date_from, 'date_to': date_to})
+        return [_appointment(record) for record in result['appointments']]
+
+    def search_appointments_by_doctor(self, doctor_name: str, date_from: Optional[str] = None, date_to: Optional[str] = None) -> List[Tuple]:
+        result = self._request('GET', '/search', {'doctor': doctor_name, 'date_from': date_from, 'date_to': date_to})
+        return [_appointment(record) for record in result['appointments']]
+
+    def search_appointments_by_prefix(self, table: str, prefix: str, limit: int = LIVE_SEARCH_LIMIT) -> Tuple[List[Tuple], bool]:
+        result = self._request('GET', '/search/prefix', {'target': table, 'q': prefix, 'limit': limit})
+        return [_appointment(record) for record in result['appointments']], result['complete']
+
+    def generate_receipt(self, appointment_id: int) -> str:
+        return self._request('GET', f'/appointments/{appointment_id}/receipt')['receipt']
+
+    def find_conflict(self, doctor_name: str, date: str, time: str, exclude_id: Optional[int] = None) -> Optional[int]:
+        return self._request('GET', '/conflict', {'doctor_name': doctor_name, 'date': date, 'time': time,
+                                                  'exclude_id': exclude_id})['conflict_id']
+
+    def next_free_slots(self, doctor_name: Optional[str] = None, doctor_specialty: Optional[str] = None, count: int = 5) -> List[Tuple[str, str, str]]:
+        result = self._request('GET', '/free-slots', {'doctor_name': doctor_name, 'doctor_specialty': doctor_specialty, 'count': count})
+        return [(slot['date'], slot['time'], slot['doctor_name']) for slot in result['slots']]
+
+    def appointment_statistics(self, date_from: Optional[str] = None, date_to: Optional[str] = None) -> Dict[str, List[Tuple]]:
+        result = self._request('GET', '/stats', {'date_from': date_from, 'date_to': date_to})
+        return {key: [tuple(row) for row in rows] for key, rows in result.items()}
+
+    def change_log_position(self) -> int:
+        return self._request('GET', '/changes')['position']
+
+    def changes_since(self, seq: int, limit: int = CHANGES_LIMIT) -> Tuple[int, Optional[Dict[int, Optional[Tuple]]]]:
+        result = self._request('GET', '/changes', {'since': seq, 'limit': limit})
+        if result['changes'] is None:
+            return result['position'], None
+        return result['position'], {change['id']: change['appointment'] and _appointment(change['appointment'])
+                                    for change in result['changes']}
+
+    def import_appointments(self, path: str, batch_size: int = IMPORT_BATCH_SIZE) -> Tuple[int, List[Tuple[int, str]]]:
+        # Le fichier est lu sur ce poste (une erreur de lecture est levée ici) et envoyé par morceaux
+        imported = 0
+        rejects: List[Tuple[int, str]] = []
+        chunk: List[List] = []
+        chunk_bytes = 0
+
+        def send() -> None:
+            nonlocal imported
+            result = self._request('POST', '/import', body={'records': chunk, 'batch_size': batch_size})
+            imported += result['imported']
+            rejects.extend((reject['line'], reject['reason']) for reject in result['rejected'])
+
+        for line_number, record in read_import_records(path):
+            if isinstance(record, Exception):
+                rejects.append((line_number, f"JSON invalide: {record}"))
+                continue
+            size = len(json.dumps(record, ensure_ascii=False).encode('utf-8')) + 16
+            if chunk and (chunk_bytes + size > IMPORT_CHUNK_BYTES or len(chunk) >= batch_size):
+                send()
+                chunk, chunk_bytes = [], 0
+            chunk.append([line_number, record])
+            chunk_bytes += size
+        if chunk:
+            send()
+        rejects.sort()
+        return imported, rejects
@@ -0,0 +1,1365 @@
+# Cœur sans interface graphique du gestionnaire de rendez-vous : n'importe que la bibliothèque standard
+# (sqlite3 en tête), pour que les scripts et la ligne de commande démarrent sans charger Tk ni PIL.
+import sqlite3
+import bisect
+import csv
+import datetime
+import glob
+import heapq
+import itertools
+import json
+import os
+import re
+import sys
+import threading
+import urllib.parse
+from collections import OrderedDict
+from contextlib import contextmanager
+from time import monotonic, perf_counter
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional
+
+import rendezvous_metrics as metrics
+from rendezvous_metrics import instrumented
+
+# Configuration de la connexion à la base de données
+database_path = 'appointments_db.sqlite'
+
+# Réglages appliqués à chaque connexion ouverte par le gestionnaire de connexions
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA cache_size = -16000',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA busy_timeout = 5000',
+)
+# Nombre de requêtes préparées gardées en cache par connexion
+STATEMENT_CACHE_SIZE = 256
+
+# Une connexion persistante par thread et par fichier de base de données
+_local = threading.local()
+_connections_lock = threading.Lock()
+_open_connections: List[sqlite3.Connection] = []
+_pool_epoch = 0
+
+# Colonnes d'un rendez-vous telles que renvoyées par les fonctions publiques (vue appointment_details)
+APPOINTMENT_COLUMNS = ('id', 'date', 'time', 'patient_name', 'gender', 'age', 'consultation_reason', 'doctor_name', 'doctor_specialty')
+APPOINTMENT_COLUMNS_SQL = ', '.join(APPOINTMENT_COLUMNS)
+# starts_at est lu en plus pour servir de clé de pagination
+SELECTED_COLUMNS = APPOINTMENT_COLUMNS + ('starts_at',)
+# Tris servis par un index (clé primaire, idx_appointments_starts_at) : sur une autre colonne, chaque page
+# parcourrait et trierait toute la table
+SORT_COLUMNS = ('id', 'date', 'time')
+SELECT_APPOINTMENTS_SQL = 'SELECT %s FROM appointment_details' % ', '.join(SELECTED_COLUMNS)
+# Champs attendus par add_appointment, et donc par l'import en masse
+IMPORT_FIELDS = APPOINTMENT_COLUMNS[1:]
+# Durée d'une consultation et plage horaire proposée pour les créneaux libres, en minutes
+APPOINTMENT_DURATION = 30
+WORKING_HOURS = (8 * 60, 18 * 60)
+# Nombre de jours parcourus au maximum pour trouver des créneaux libres
+FREE_SLOT_HORIZON_DAYS = 60
+TIME_PATTERN = re.compile(r'([01][0-9]|2[0-3]):[0-5][0-9]')
+# Formats rencontrés dans les bases créées avant la normalisation du schéma
+LEGACY_DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%m/%d/%y', '%Y/%m/%d', '%d-%m-%Y', '%d.%m.%Y')
+LEGACY_TIME_PATTERN = re.compile(r'(\d{1,2})\s*(?:[:hH]\s*(\d{2})?)?(?::\d{2})?')
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+# Nombre de lignes insérées par transaction lors d'un import
+IMPORT_BATCH_SIZE = 10000
+# Nombre de rendez-vous chargés à chaque défilement de la grille
+PAGE_SIZE = 200
+# Les rendez-vous plus anciens que l'horizon sont déplacés dans une base d'archive par année
+ARCHIVE_HORIZON_DAYS = 2 * 365
+# Archives attachées au plus en même temps à une connexion (SQLite en accepte 10 par défaut)
+ARCHIVE_ATTACH_LIMIT = 8
+# Copies d'une année recommencées si la base principale change entre la copie et la suppression
+ARCHIVE_COPY_ATTEMPTS = 3
+# Nombre de résultats de recherche et de reçus gardés en mémoire
+RESULT_CACHE_SIZE = 256
+# Jours affichés de part et d'autre d'aujourd'hui dans les statistiques quotidiennes
+STATISTICS_DAYS = 30
+# Nombre maximal de rendez-vous renvoyés par la recherche au fil de la frappe
+LIVE_SEARCH_LIMIT = 500
+# Durée de conservation du journal des modifications ; un client absent plus longtemps recharge tout
+CHANGE_LOG_RETENTION_DAYS = 7
+# Intervalle minimal entre deux compactages du journal, en secondes
+CHANGE_LOG_COMPACT_INTERVAL = 3600
+# Au-delà de ce nombre de rendez-vous modifiés, changes_since() demande un rechargement complet
+CHANGES_LIMIT = 1000
+
+# Passe à True quand l'index FTS5 des noms est disponible
+fts_enabled = False
+
+def get_connection() -> sqlite3.Connection:
+    if getattr(_local, 'epoch', None) != _pool_epoch:
+        _local.epoch = _pool_epoch
+        _local.connections = {}
+    connections: Dict[str, sqlite3.Connection] = _local.connections
+    conn = connections.get(database_path)
+    if conn is None:
+        # isolation_level=None : les transactions sont gérées explicitement par transaction()
+        # uri=True : les archives sont attachées en lecture seule par une URI file:...?mode=ro
+        conn = sqlite3.connect(database_path, isolation_level=None, check_same_thread=False, uri=True,
+                               cached_statements=STATEMENT_CACHE_SIZE, factory=metrics.InstrumentedConnection)
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        connections[database_path] = conn
+        with _connections_lock:
+            _open_connections.append(conn)
+    return conn
+
+def close_connections() -> None:
+    global _pool_epoch
+    result_cache.close()
+    with _connections_lock:
+        for conn in _open_connections:
+            try:
+                conn.close()
+            except sqlite3.Error as err:
+                print(f"Erreur lors de la fermeture d'une connexion: {err}", file=sys.stderr)
+        _open_connections.clear()
+        _pool_epoch += 1
+
+@contextmanager
+def transaction() -> Iterator[sqlite3.Connection]:
+    conn = get_connection()
+    if conn.in_transaction:
+        # Transaction imbriquée : un point de sauvegarde permet d'annuler uniquement ce bloc
+        conn.execute('SAVEPOINT nested')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK TO nested')
+            conn.execute('RELEASE nested')
+            raise
+        conn.execute('RELEASE nested')
+        return
+    started = perf_counter()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+    finally:
+        # Compté même en cas d'échec : c'est alors tout le busy_timeout qui a été attendu
+        metrics.record_lock_wait(perf_counter() - started)
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+# Version du schéma enregistrée dans PRAGMA user_version ; chaque étape de MIGRATIONS fait passer à la suivante
+SCHEMA_VERSION = 4
+
+def _create_legacy_table(conn: sqlite3.Connection) -> None:
+    # Version 1 : table unique d'origine, conservée comme point de départ des bases existantes
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS appointments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            time TEXT NOT NULL,
+            patient_name TEXT NOT NULL,
+            gender TEXT NOT NULL,
+            age INTEGER NOT NULL,
+            consultation_reason TEXT NOT NULL,
+            doctor_name TEXT NOT NULL,
+            doctor_specialty TEXT NOT NULL
+        )
+    ''')
+
+def _normalize_schema(conn: sqlite3.Connection) -> None:
+    # Version 2 : patients et médecins dans leurs propres tables, début du rendez-vous en entier indexé
+    for trigger in ('appointments_fts_insert', 'appointments_fts_delete', 'appointments_fts_update'):
+        conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    conn.execute('DROP TABLE IF EXISTS appointments_fts')
+    for index in ('idx_appointments_doctor_date_time', 'idx_appointments_date_time', 'idx_appointments_specialty_doctor'):
+        conn.execute(f'DROP INDEX IF EXISTS {index}')
+    conn.execute('ALTER TABLE appointments RENAME TO appointments_v1')
+
+    conn.execute('''
+        CREATE TABLE patients (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            gender TEXT NOT NULL,
+            age INTEGER NOT NULL,
+            UNIQUE (name, gender, age)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE doctors (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            specialty TEXT NOT NULL,
+            UNIQUE (name, specialty)
+        )
+    ''')
+    # starts_at : secondes depuis 1970-01-01 00:00, en heure locale du cabinet (sans fuseau)
+    conn.execute('''
+        CREATE TABLE appointments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            starts_at INTEGER NOT NULL,
+            patient_id INTEGER NOT NULL REFERENCES patients (id),
+            doctor_id INTEGER NOT NULL REFERENCES doctors (id),
+            consultation_reason TEXT NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX idx_appointments_starts_at ON appointments (starts_at)')
+    conn.execute('CREATE INDEX idx_appointments_doctor_starts_at ON appointments (doctor_id, starts_at)')
+    conn.execute('CREATE INDEX idx_appointments_patient_starts_at ON appointments (patient_id, starts_at)')
+    conn.execute('CREATE INDEX idx_doctors_specialty ON doctors (specialty, name)')
+    # Vue à plat : les fonctions publiques continuent de renvoyer les mêmes tuples qu'avant
+    conn.execute('''
+        CREATE VIEW appointment_details AS
+        SELECT a.id, date(a.starts_at, 'unixepoch') AS date, strftime('%H:%M', a.starts_at, 'unixepoch') AS time,
+               p.name AS patient_name, p.gender, p.age, a.consultation_reason, d.name AS doctor_name,
+               d.specialty AS doctor_specialty, a.starts_at, a.patient_id, a.doctor_id
+        FROM appointments a
+        JOIN patients p ON p.id = a.patient_id
+        JOIN doctors d ON d.id = a.doctor_id
+    ''')
+
+    conn.create_function('legacy_timestamp', 2, _legacy_timestamp, deterministic=True)
+    conn.execute('INSERT OR IGNORE INTO patients (name, gender, age) SELECT DISTINCT patient_name, gender, age FROM appointments_v1')
+    conn.execute('INSERT OR IGNORE INTO doctors (name, specialty) SELECT DISTINCT doctor_name, doctor_specialty FROM appointments_v1')
+    conn.execute('''
+        INSERT INTO appointments (id, starts_at, patient_id, doctor_id, consultation_reason)
+        SELECT v.id, legacy_timestamp(v.date, v.time), p.id, d.id, v.consultation_reason
+        FROM appointments_v1 v
+        JOIN patients p ON p.name = v.patient_name AND p.gender = v.gender AND p.age = v.age
+        JOIN doctors d ON d.name = v.doctor_name AND d.specialty = v.doctor_specialty
+        WHERE legacy_timestamp(v.date, v.time) IS NOT NULL
+    ''')
+    # Les dates illisibles ne sont pas perdues : elles restent à part pour être corrigées à la main
+    unreadable = conn.execute('SELECT COUNT(*) FROM appointments_v1 WHERE legacy_timestamp(date, time) IS NULL').fetchone()[0]
+    if unreadable:
+        conn.execute('CREATE TABLE appointments_unmigrated AS SELECT * FROM appointments_v1 WHERE legacy_timestamp(date, time) IS NULL')
+        print(f"{unreadable} rendez-vous avec une date ou une heure illisible ont été placés dans appointments_unmigrated", file=sys.stderr)
+    # Ne jamais réattribuer l'identifiant d'un rendez-vous supprimé avant la migration
+    conn.execute('''
+        UPDATE sqlite_sequence SET seq = MAX(seq, COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'appointments_v1'), 0))
+        WHERE name = 'appointments'
+    ''')
+    conn.execute('DROP TABLE appointments_v1')
+    conn.execute("DELETE FROM sqlite_sequence WHERE name = 'appointments_v1'")
+
+# Tables de synthèse tenues à jour par déclencheurs : (table, colonne clé, type, expression sur une ligne de appointments)
+STATISTICS_TABLES = (
+    ('stats_by_day', 'day', 'TEXT', "date({row}.starts_at, 'unixepoch')"),
+    ('stats_by_doctor', 'doctor_id', 'INTEGER', '{row}.doctor_id'),
+    ('stats_by_specialty', 'specialty', 'TEXT', '(SELECT specialty FROM doctors WHERE id = {row}.doctor_id)'),
+    ('stats_by_reason', 'reason', 'TEXT', '{row}.consultation_reason'),
+)
+
+def _statistics_increment_sql(row: str) -> str:
+    return '\n'.join(f'''
+            INSERT INTO {table} ({key}, appointments) VALUES ({expression.format(row=row)}, 1)
+            ON CONFLICT ({key}) DO UPDATE SET appointments = appointments + 1;''' for table, key, _, expression in STATISTICS_TABLES)
+
+def _statistics_decrement_sql(row: str) -> str:
+    return '\n'.join(f'''
+            UPDATE {table} SET appointments = appointments - 1 WHERE {key} = {expression.format(row=row)};'''
+                     for table, key, _, expression in STATISTICS_TABLES)
+
+def _statistics_insert_trigger_sql() -> str:
+    return f'''
+        CREATE TRIGGER IF NOT EXISTS appointments_stats_insert AFTER INSERT ON appointments BEGIN
+            {_statistics_increment_sql('new')}
+        END
+    '''
+
+def _statistics_delete_trigger_sql() -> str:
+    return f'''
+        CREATE TRIGGER IF NOT EXISTS appointments_stats_delete AFTER DELETE ON appointments BEGIN
+            {_statistics_decrement_sql('old')}
+        END
+    '''
+
+def _credit_statistics(conn: sqlite3.Connection, where: str = '', params: Tuple = (), sign: int = 1) -> None:
+    # Ajoute (ou retire, sign=-1) en une requête groupée par table les rendez-vous choisis par where
+    for table, key, _, expression in STATISTICS_TABLES:
+        conn.execute(f'''
+            INSERT INTO {table} ({key}, appointments)
+            SELECT {expression.format(row='a')}, {sign} * COUNT(*) FROM appointments a WHERE true {where} GROUP BY 1
+            ON CONFLICT ({key}) DO UPDATE SET appointments = appointments + excluded.appointments
+        ''', params)
+
+def _add_statistics(conn: sqlite3.Connection) -> None:
+    # Version 3 : comptes par jour, médecin, spécialité et motif, pour un tableau de bord dont le coût
+    # ne dépend pas de la taille de l'historique
+    for table, key, key_type, _ in STATISTICS_TABLES:
+        conn.execute(f'''
+            CREATE TABLE {table} (
+                {key} {key_type} PRIMARY KEY,
+                appointments INTEGER NOT NULL
+            ) WITHOUT ROWID
+        ''')
+    conn.execute(_statistics_insert_trigger_sql())
+    conn.execute(_statistics_delete_trigger_sql())
+    conn.execute(f'''
+        CREATE TRIGGER appointments_stats_update AFTER UPDATE OF starts_at, doctor_id, consultation_reason ON appointments BEGIN
+            {_statistics_decrement_sql('old')}
+            {_statistics_increment_sql('new')}
+        END
+    ''')
+    _credit_statistics(conn)
+
+# Opérations enregistrées dans le journal des modifications, une par déclencheur sur appointments
+CHANGE_LOG_TRIGGERS = (('insert', 'new'), ('update', 'new'), ('delete', 'old'))
+
+def _change_log_trigger_sql(operation: str) -> str:
+    row = dict(CHANGE_LOG_TRIGGERS)[operation]
+    return f'''
+        CREATE TRIGGER IF NOT EXISTS appointments_log_{operation} AFTER {operation.upper()} ON appointments BEGIN
+            INSERT INTO change_log (appointment_id, operation) VALUES ({row}.id, '{operation}');
+        END
+    '''
+
+def _add_change_log(conn: sqlite3.Connection) -> None:
+    # Version 4 : journal des modifications en ajout seul. AUTOINCREMENT garantit des numéros croissants
+    # jamais réutilisés, même après compactage : un client peut demander ce qui a changé depuis le sien.
+    conn.execute('''
+        CREATE TABLE change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            appointment_id INTEGER NOT NULL,
+            operation TEXT NOT NULL CHECK (operation IN ('insert', 'update', 'delete')),
+            changed_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+        )
+    ''')
+    for operation, _ in CHANGE_LOG_TRIGGERS:
+        conn.execute(_change_log_trigger_sql(operation))
+
+MIGRATIONS = (_create_legacy_table, _normalize_schema, _add_statistics, _add_change_log)
+
+def _timestamp(date: str, time: str) -> int:
+    minutes = _minutes(time)
+    if minutes is None:
+        raise ValueError(f"heure invalide (HH:MM attendu): {time}")
+    return (datetime.date.fromisoformat(date).toordinal() - EPOCH_ORDINAL) * 86400 + minutes * 60
+
+def _day_bounds(date: str) -> Tuple[int, int]:
+    start = (datetime.date.fromisoformat(date).toordinal() - EPOCH_ORDINAL) * 86400
+    return start, start + 86400
+
+def _legacy_timestamp(date: str, time: str) -> Optional[int]:
+    # Les anciennes saisies suivent le format du calendrier (selon la langue du poste) et une heure libre
+    parsed_date = None
+    for date_format in LEGACY_DATE_FORMATS:
+        try:
+            parsed_date = datetime.datetime.strptime(str(date).strip(), date_format).date()
+            break
+        except ValueError:
+            continue
+    match = LEGACY_TIME_PATTERN.fullmatch(str(time).strip())
+    if parsed_date is None or match is None:
+        return None
+    hours, minutes = int(match.group(1)), int(match.group(2) or 0)
+    if hours > 23 or minutes > 59:
+        return None
+    return (parsed_date.toordinal() - EPOCH_ORDINAL) * 86400 + hours * 3600 + minutes * 60
+
+def migrate_database() -> None:
+    conn = get_connection()
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+    with transaction() as conn:
+        # Relire la version une fois le verrou d'écriture obtenu : un autre poste a pu migrer entre-temps
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        existing = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'appointments'").fetchone()
+        for migration in MIGRATIONS[version:]:
+            migration(conn)
+        conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    if existing and version < 2:
+        # Récupérer la place libérée par l'ancienne table à plat
+        conn.execute('VACUUM')
+
+def create_database_and_table() -> None:
+    try:
+        migrate_database()
+        create_search_index()
+    except sqlite3.Error as err:
+        print(f"Erreur lors de la création de la base de données ou de la table: {err}", file=sys.stderr)
+
+def _fts_insert_trigger_sql(table: str) -> str:
+    return f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {table}_fts (rowid, name) VALUES (new.id, new.name);
+        END
+    '''
+
+def create_search_index() -> None:
+    global fts_enabled
+    try:
+        with transaction() as conn:
+            for table in ('patients', 'doctors'):
+                exists = conn.execute('SELECT 1 FROM sqlite_master WHERE name = ?', (f'{table}_fts',)).fetchone()
+                # Index trigramme sur les noms : recherche de sous-chaînes sans parcourir les tables
+                conn.execute(f'''
+                    CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5(
+                        name, content='{table}', content_rowid='id', tokenize='trigram'
+                    )
+                ''')
+                conn.execute(_fts_insert_trigger_sql(table))
+                conn.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN
+                        INSERT INTO {table}_fts ({table}_fts, rowid, name) VALUES ('delete', old.id, old.name);
+                    END
+                ''')
+                conn.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE OF name ON {table} BEGIN
+                        INSERT INTO {table}_fts ({table}_fts, rowid, name) VALUES ('delete', old.id, old.name);
+                        INSERT INTO {table}_fts (rowid, name) VALUES (new.id, new.name);
+                    END
+                ''')
+                if not exists:
+                    # Base existante : indexer les noms déjà enregistrés
+                    conn.execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')")
+        fts_enabled = True
+    except sqlite3.OperationalError as err:
+        # SQLite compilé sans FTS5 : les recherches se replient sur LIKE
+        fts_enabled = False
+        print(f"Index de recherche plein texte indisponible: {err}", file=sys.stderr)
+
+def _patient_id(conn: sqlite3.Connection, patient_name: str, gender: str, age: int) -> int:
+    row = conn.execute('SELECT id FROM patients WHERE name = ? AND gender = ? AND age = ?', (patient_name, gender, age)).fetchone()
+    if row:
+        return row[0]
+    return conn.execute('INSERT INTO patients (name, gender, age) VALUES (?, ?, ?)', (patient_name, gender, age)).lastrowid
+
+def _doctor_id(conn: sqlite3.Connection, doctor_name: str, doctor_specialty: str) -> int:
+    row = conn.execute('SELECT id FROM doctors WHERE name = ? AND specialty = ?', (doctor_name, doctor_specialty)).fetchone()
+    if row:
+        return row[0]
+    return conn.execute('INSERT INTO doctors (name, specialty) VALUES (?, ?)', (doctor_name, doctor_specialty)).lastrowid
+
+INSERT_APPOINTMENT_SQL = '''
+    INSERT INTO appointments (starts_at, patient_id, doctor_id, consultation_reason)
+    VALUES (?, ?, ?, ?)
+'''
+
+@instrumented
+def add_appointment(date: str, time: str, patient_name: str, gender: str, age: int, consultation_reason: str, doctor_name: str, doctor_specialty: str) -> Optional[int]:
+    try:
+        starts_at = _timestamp(date, time)
+        with transaction() as conn:
+            patient_id = _patient_id(conn, patient_name, gender, age)
+            doctor_id = _doctor_id(conn, doctor_name, doctor_specialty)
+            cursor = conn.execute(INSERT_APPOINTMENT_SQL, (starts_at, patient_id, doctor_id, consultation_reason))
+        result_cache.invalidate()
+        _maybe_compact_change_log()
+        schedule.forget(doctor_name, date)
+        return cursor.lastrowid
+    except (sqlite3.Error, ValueError) as err:
+        print(f"Erreur lors de l'ajout du rendez-vous: {err}", file=sys.stderr)
+        return None
+
+@instrumented
+def delete_appointment(appointment_id: int) -> None:
+    try:
+        with transaction() as conn:
+            conn.execute('DELETE FROM appointments WHERE id = ?', (appointment_id,))
+        result_cache.invalidate()
+        _maybe_compact_change_log()
+        schedule.forget_appointment(appointment_id)
+    except sqlite3.Error as err:
+        print(f"Erreur lors de la suppression du rendez-vous: {err}", file=sys.stderr)
+
+@instrumented
+def modify_appointment(appointment_id: int, date: str, time: str, patient_name: str, gender: str, age: int, consultation_reason: str, doctor_name: str, doctor_specialty: str) -> Optional[int]:
+    # Renvoie l'identifiant modifié, ou None en cas d'échec ou si le rendez-vous n'existe plus
+    try:
+        starts_at = _timestamp(date, time)
+        with transaction() as conn:
+            patient_id = _patient_id(conn, patient_name, gender, age)
+            doctor_id = _doctor_id(conn, doctor_name, doctor_specialty)
+            cursor = conn.execute('''
+                UPDATE appointments
+                SET starts_at = ?, patient_id = ?, doctor_id = ?, consultation_reason = ?
+                WHERE id = ?
+            ''', (starts_at, patient_id, doctor_id, consultation_reason, appointment_id))
+        if not cursor.rowcount:
+            print(f"Rendez-vous introuvable: {appointment_id}", file=sys.stderr)
+            return None
+        result_cache.invalidate()
+        _maybe_compact_change_log()
+        schedule.forget_appointment(appointment_id)
+        schedule.forget(doctor_name, date)
+        return appointment_id
+    except (sqlite3.Error, ValueError) as err:
+        print(f"Erreur lors de la modification du rendez-vous: {err}", file=sys.stderr)
+        return None
+
+@instrumented
+def display_appointments() -> List[Tuple]:
+    # Conservée pour compatibilité : préférer iter_appointments() qui ne charge qu'une page à la fois
+    try:
+        return list(iter_appointments())
+    except sqlite3.Error as err:
+        print(f"Erreur lors du chargement des rendez-vous: {err}", file=sys.stderr)
+        return []
+
+def _sort_keys(order_by: str) -> Tuple[str, ...]:
+    if order_by not in SORT_COLUMNS:
+        raise ValueError(f"Colonne de tri non prise en charge: {order_by}")
+    return ('id',) if order_by == 'id' else ('starts_at', 'id')
+
+def _iter_source(source: str, keys: Tuple[str, ...], descending: bool, filters: List[str], params: List, page_size: int,
+                 archive_year: Optional[int] = None, after: Optional[List] = None) -> Iterator[Tuple]:
+    key_indexes = [SELECTED_COLUMNS.index(key) for key in keys]
+    direction = 'DESC' if descending else 'ASC'
+    select_sql = 'SELECT %s FROM %s' % (', '.join(SELECTED_COLUMNS), source)
+    order = ', '.join(f'{key} {direction}' for key in keys)
+    # Pagination par clé : chaque page reprend après la dernière ligne lue, sans OFFSET
+    keyset = '(%s) %s (%s)' % (', '.join(keys), '<' if descending else '>', ', '.join('?' * len(keys)))
+    first_sql = '%s%s ORDER BY %s LIMIT ?' % (select_sql, ' WHERE ' + ' AND '.join(filters) if filters else '', order)
+    next_sql = '%s WHERE %s ORDER BY %s LIMIT ?' % (select_sql, ' AND '.join(filters + [keyset]), order)
+    last_key = after
+    # Une erreur sqlite3.Error remonte à l'appelant : une liste tronquée ne doit pas passer pour une liste complète
+    while True:
+        conn = get_connection()
+        if archive_year is not None:
+            # Une autre lecture a pu détacher l'archive entre deux pages
+            _attach_archive(conn, archive_year)
+        if last_key is None:
+            rows = conn.execute(first_sql, params + [page_size]).fetchall()
+        else:
+            rows = conn.execute(next_sql, params + last_key + [page_size]).fetchall()
+        yield from rows
+        if len(rows) < page_size:
+            return
+        last_key = [rows[-1][index] for index in key_indexes]
+
+def _iter_rows(order_by: str, descending: bool, date_from: Optional[str], date_to: Optional[str], doctor_name: Optional[str],
+               doctor_specialty: Optional[str], page_size: int, after: Optional[List]) -> Iterator[Tuple]:
+    # Lignes complètes (SELECTED_COLUMNS), clé de pagination comprise
+    keys = _sort_keys(order_by)
+    if after is not None and len(after) != len(keys):
+        raise ValueError(f"Clé de reprise invalide: {after}")
+    filters: List[str] = []
+    params: List = []
+    # Les bornes de dates deviennent des bornes sur starts_at pour profiter de l'index
+    for clause, value in (('starts_at >= ?', date_from and _day_bounds(date_from)[0]),
+                          ('starts_at < ?', date_to and _day_bounds(date_to)[1]),
+                          ('doctor_id IN (SELECT id FROM main.doctors WHERE name = ?)', doctor_name),
+                          ('doctor_id IN (SELECT id FROM main.doctors WHERE specialty = ?)', doctor_specialty)):
+        if value is not None:
+            filters.append(clause)
+            params.append(value)
+    sources = [_iter_source('main.appointment_details', keys, descending, filters, params, page_size, after=after)]
+    # Seule une borne de période fait descendre dans les archives ; une archive illisible est une erreur, pas un oubli
+    for year in _archive_years_between(date_from, date_to):
+        schema = _attach_archive(get_connection(), year)
+        sources.append(_iter_source(f'{schema}.appointment_details', keys, descending, filters, params, page_size, year, after))
+    if len(sources) == 1:
+        return sources[0]
+    # Chaque source est déjà triée : une fusion suffit, sans tout charger
+    key_indexes = [SELECTED_COLUMNS.index(key) for key in keys]
+    return heapq.merge(*sources, key=lambda row: [row[index] for index in key_indexes], reverse=descending)
+
+@instrumented
+def iter_appointments(order_by: str = 'date', descending: bool = False, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                      doctor_name: Optional[str] = None, doctor_specialty: Optional[str] = None, page_size: int = PAGE_SIZE,
+                      after: Optional[List] = None) -> Iterator[Tuple]:
+    # after : clé de pagination renvoyée par appointments_page, la lecture reprend juste après
+    for row in _iter_rows(order_by, descending, date_from, date_to, doctor_name, doctor_specialty, page_size, after):
+        yield row[:len(APPOINTMENT_COLUMNS)]
+
+@instrumented
+def appointments_page(order_by: str = 'date', descending: bool = False, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                      doctor_name: Optional[str] = None, doctor_specialty: Optional[str] = None, limit: int = PAGE_SIZE,
+                      after: Optional[List] = None) -> Tuple[List[Tuple], Optional[List]]:
+    # Une page et la clé de sa dernière ligne (None en fin de liste) : rien n'est gardé entre deux pages
+    if limit < 1:
+        raise ValueError(f"Taille de page invalide: {limit}")
+    rows = list(itertools.islice(_iter_rows(order_by, descending, date_from, date_to, doctor_name, doctor_specialty, limit, after), limit))
+    next_after = None
+    if len(rows) == limit:
+        next_after = [rows[-1][SELECTED_COLUMNS.index(key)] for key in _sort_keys(order_by)]
+    return [row[:len(APPOINTMENT_COLUMNS)] for row in rows], next_after
+
+@instrumented
+def export_appointments(path: str, **filters) -> Optional[int]:
+    # Même en-tête que celui attendu par import_appointments (la colonne id y est ignorée).
+    # None si l'export a échoué : le fichier peut alors être incomplet
+    count = 0
+    try:
+        with open(path, 'w', newline='', encoding='utf-8') as export_file:
+            writer = csv.writer(export_file)
+            writer.writerow(APPOINTMENT_COLUMNS)
+            for appointment in iter_appointments(**filters):
+                writer.writerow(appointment)
+                count += 1
+    except (OSError, sqlite3.Error) as err:
+        print(f"Erreur lors de l'export des rendez-vous: {err}", file=sys.stderr)
+        return None
+    return count
+
+def _change_log_position(conn: sqlite3.Connection) -> int:
+    # Dernier numéro attribué ; sqlite_sequence le garde même quand le compactage a vidé le journal
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'").fetchone()
+    return row[0] if row else 0
+
+def _changes(conn: sqlite3.Connection, seq: int, limit: int) -> Tuple[int, Optional[Dict[int, Optional[Tuple]]]]:
+    # Lu dans une seule transaction de lecture : la position renvoyée correspond exactement aux lignes lues
+    own_transaction = not conn.in_transaction
+    if own_transaction:
+        conn.execute('BEGIN')
+    try:
+        position = _change_log_position(conn)
+        oldest = conn.execute('SELECT MIN(seq) FROM change_log').fetchone()[0]
+        # Le compactage a retiré des numéros postérieurs à seq, ou seq vient d'une autre base
+        if seq > position or seq < (oldest or position + 1) - 1:
+            return position, None
+        ids = [row[0] for row in conn.execute('SELECT DISTINCT appointment_id FROM change_log WHERE seq > ? LIMIT ?', (seq, limit + 1))]
+        if len(ids) > limit:
+            return position, None
+        changes: Dict[int, Optional[Tuple]] = dict.fromkeys(ids)
+        for row in conn.execute(f'''
+            SELECT {APPOINTMENT_COLUMNS_SQL} FROM main.appointment_details WHERE id IN (SELECT value FROM json_each(?))
+        ''', (json.dumps(ids),)):
+            changes[row[0]] = row
+        return position, changes
+    finally:
+        if own_transaction:
+            conn.execute('COMMIT')
+
+@instrumented
+def change_log_position() -> int:
+    # Position de départ d'un client qui vient de tout charger
+    try:
+        return _change_log_position(get_connection())
+    except sqlite3.Error as err:
+        print(f"Erreur lors de la lecture du journal des modifications: {err}", file=sys.stderr)
+        return 0
+
+@instrumented
+def changes_since(seq: int, limit: int = CHANGES_LIMIT) -> Tuple[int, Optional[Dict[int, Optional[Tuple]]]]:
+    # Renvoie (position, changements) : pour chaque rendez-vous ajouté, modifié ou supprimé après seq, son état
+    # actuel (None s'il n'existe plus). changements vaut None quand le journal ne suffit plus (compacté depuis seq,
+    # ou plus de limit rendez-vous touchés) : le client doit alors tout recharger.
+    try:
+        return _changes(get_connection(), seq, limit)
+    except sqlite3.Error as err:
+        print(f"Erreur lors de la lecture du journal des modifications: {err}", file=sys.stderr)
+        return seq, None
+
+# Les processus de courte durée (commandes de la ligne de commande) ne compactent pas à chaque écriture :
+# l'interface et le service s'en chargent
+auto_compact_change_log = True
+_last_compaction: Optional[float] = None
+
+@instrumented
+def compact_change_log(retention_days: int = CHANGE_LOG_RETENTION_DAYS) -> int:
+    # Supprime les entrées plus anciennes que la durée de conservation, toujours par le début du journal
+    global _last_compaction
+    _last_compaction = monotonic()
+    cutoff = int(datetime.datetime.now().timestamp()) - retention_days * 86400
+    try:
+        with transaction() as conn:
+            # Pas d'index sur changed_at : le journal est parcouru dans l'ordre de seq jusqu'à la première entrée
+            # encore conservée, soit autant de lignes que celles qui vont être supprimées
+            return conn.execute('''
+                DELETE FROM change_log
+                WHERE seq < COALESCE((SELECT seq FROM change_log WHERE changed_at >= ? ORDER BY seq LIMIT 1), 1 << 62)
+            ''', (cutoff,)).rowcount
+    except sqlite3.Error as err:
+        print(f"Erreur lors du compactage du journal des modifications: {err}", file=sys.stderr)
+        return 0
+
+def _maybe_compact_change_log() -> None:
+    # Compactage périodique porté par les écritures : au plus une fois par CHANGE_LOG_COMPACT_INTERVAL et par processus
+    if not auto_compact_change_log:
+        return
+    if _last_compaction is None or monotonic() - _last_compaction >= CHANGE_LOG_COMPACT_INTERVAL:
+        compact_change_log()
+
+class ResultCache:
+    # Cache LRU des résultats de lecture, indexé par requête et paramètres.
+    # Chaque entrée garde le jeton de génération lu avant d'exécuter la requête : elle n'est servie que si
+    # le jeton n'a pas changé depuis. Le jeton combine un compteur incrémenté par nos écritures et le
+    # PRAGMA data_version d'une connexion de surveillance, qui change à chaque écriture validée par
+    # n'importe quelle autre connexion, y compris celles d'un autre processus.
+    # Quand le jeton change, le journal des modifications dit quels rendez-vous ont changé : les reçus des
+    # autres restent valides, seules les recherches sont toutes écartées.
+    def __init__(self, maxsize: int = RESULT_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+        self._generation = 0
+        self._monitor: Optional[sqlite3.Connection] = None
+        self._monitor_path: Optional[str] = None
+        self._token: Optional[Tuple[str, int, int]] = None
+        self._seq: Optional[int] = None
+
+    def _read_token(self) -> Tuple[Tuple[str, int, int], int]:
+        with self._lock:
+            if self._monitor is None or self._monitor_path != database_path:
+                if self._monitor is not None:
+                    self._monitor.close()
+                self._monitor = sqlite3.connect(database_path, check_same_thread=False)
+                self._monitor_path = database_path
+                self._entries.clear()
+                self._seq = None
+            # data_version et position du journal lus dans la même transaction de lecture : le jeton désigne
+            # exactement l'état du journal auquel il correspond
+            self._monitor.execute('BEGIN')
+            try:
+                position = _change_log_position(self._monitor)
+                data_version = self._monitor.execute('PRAGMA data_version').fetchone()[0]
+            finally:
+                self._monitor.execute('COMMIT')
+            return (database_path, self._generation, data_version), position
+
+    def token(self) -> Tuple[str, int, int]:
+        return self._read_token()[0]
+
+    def _apply_changes(self, token: Tuple[str, int, int], position: int) -> None:
+        # Seules les entrées marquées du jeton associé à self._seq sont reportées sur le nouveau jeton : le journal
+        # ne dit rien des écritures antérieures à self._seq qu'une entrée plus ancienne aurait manquées
+        changes = None
+        if self._seq is not None:
+            # Le journal peut avoir avancé au-delà de position : écarter aussi ces rendez-vous reste sans risque
+            changes = _changes(self._monitor, self._seq, CHANGES_LIMIT)[1]
+        for key, (entry_token, result) in list(self._entries.items()):
+            if changes is None or entry_token != self._token or key[0] != 'receipt' or key[1] in changes:
+                del self._entries[key]
+            else:
+                self._entries[key] = (token, result)
+        self._token = token
+        self._seq = position
+
+    def get_or_run(self, key: Tuple, function, *args):
+        token, position = self._read_token()
+        with self._lock:
+            if token != self._token:
+                self._apply_changes(token, position)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == token:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        # La requête tourne hors du verrou ; une écriture concurrente rendra simplement l'entrée périmée
+        result = function(*args)
+        with self._lock:
+            self._entries[key] = (token, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return result
+
+    def invalidate(self) -> None:
+        # Les entrées touchées sont écartées à la prochaine lecture, d'après le journal des modifications
+        with self._lock:
+            self._generation += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._monitor is not None:
+                self._monitor.close()
+                self._monitor = None
+            self._entries.clear()
+            self._token = None
+            self._seq = None
+
+result_cache = ResultCache()
+
+def _like_escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def _search_appointments(table: str, text: str, date_from: Optional[str] = None, date_to: Optional[str] = None) -> List[Tuple]:
+    text = text.strip()
+    pattern = _like_escape(text)
+    column = 'patient_name' if table == 'patients' else 'doctor_name'
+    key = 'patient_id' if table == 'patients' else 'doctor_id'
+    period = (_day_bounds(date_from)[0] if date_from else -(1 << 62), _day_bounds(date_to)[1] if date_to else 1 << 62)
+    # Les correspondances en début de nom passent en premier, puis le score bm25
+    if fts_enabled and len(text) >= 3:
+        cursor = get_connection().execute(f'''
+            SELECT {APPOINTMENT_COLUMNS_SQL} FROM {table}_fts f JOIN main.appointment_details ON {key} = f.rowid
+            WHERE {table}_fts MATCH ? AND starts_at >= ? AND starts_at < ?
+            ORDER BY {column} LIKE ? ESCAPE '\\' DESC, f.rank, starts_at
+        ''', ('"%s"' % text.replace('"', '""'), *period, pattern + '%'))
+    else:
+        # Moins de trois caractères : l'index trigramme ne s'applique pas
+        cursor = get_connection().execute(f'''
+            SELECT {APPOINTMENT_COLUMNS_SQL} FROM main.appointment_details
+            WHERE {column} LIKE ? ESCAPE '\\' AND starts_at >= ? AND starts_at < ?
+            ORDER BY {column} LIKE ? ESCAPE '\\' DESC, starts_at
+        ''', ('%' + pattern + '%', *period, pattern + '%'))
+    appointments = cursor.fetchall()
+    archive_years = _archive_years_between(date_from, date_to)
+    if not archive_years:
+        return appointments
+    conn = get_connection()
+    for year in archive_years:
+        schema = _attach_archive(conn, year)
+        appointments += conn.execute(f'''
+            SELECT {APPOINTMENT_COLUMNS_SQL} FROM {schema}.appointment_details
+            WHERE {column} LIKE ? ESCAPE '\\' AND starts_at >= ? AND starts_at < ?
+            ORDER BY starts_at
+        ''', ('%' + pattern + '%', *period)).fetchall()
+    # Tri stable : les débuts de nom restent devant, archives comprises
+    index = APPOINTMENT_COLUMNS.index(column)
+    prefix = text.casefold()
+    appointments.sort(key=lambda appointment: not appointment[index].casefold().startswith(prefix))
+    return appointments
+
+@instrumented
+def search_appointments_by_patient(patient_name: str, date_from: Optional[str] = None, date_to: Optional[str] = None) -> List[Tuple]:
+    try:
+        return list(result_cache.get_or_run(('patients', patient_name, date_from, date_to), _search_appointments,
+                                            'patients', patient_name, date_from, date_to))
+    except sqlite3.Error as err:
+        print(f"Erreur lors de la recherche des rendez-vous par patient: {err}", file=sys.stderr)
+        return []
+
+@instrumented
+def search_appointments_by_doctor(doctor_name: str, date_from: Optional[str] = None, date_to: Optional[str] = None) -> List[Tuple]:
+    try:
+        return list(result_cache.get_or_run(('doctors', doctor_name, date_from, date_to), _search_appointments,
+                                            'doctors', doctor_name, date_from, date_to))
+    except sqlite3.Error as err:
+        print(f"Erreur lors de la recherche des rendez-vous par docteur: {err}", file=sys.stderr)
+        return []
+
+def _word_starts(name: str) -> Iterator[str]:
+    # Clés d'un nom : le nom entier puis chaque fin de nom commençant à un mot ("kagabe awa", "awa")
+    name = name.casefold()
+    position = 0
+    while True:
+        yield name[position:]
+        position = name.find(' ', position) + 1
+        if not position:
+            return
+
+def matches_prefix(name: str, prefix: str) -> bool:
+    prefix = prefix.casefold()
+    return any(key.startswith(prefix) for key in _word_starts(name))
+
+class NameIndex:
+    # Index trié en mémoire des noms de patients et de médecins, interrogé par bisect.
+    # Patients et médecins ne sont jamais modifiés ni supprimés : après une écriture (même jeton que
+    # result_cache), seuls les noms d'identifiant supérieur au dernier indexé sont ajoutés.
+    # Au-delà de NEW_NAMES_LIMIT nouveaux noms (import), l'index est reconstruit d'un bloc.
+    NEW_NAMES_LIMIT = 1000
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._keys: Dict[str, List[str]] = {}
+        self._ids: Dict[str, List[int]] = {}
+        self._last_ids: Dict[str, int] = {}
+        self._token: Optional[Tuple] = None
+
+    def _load(self, table: str) -> None:
+        rows = get_connection().execute(f'SELECT id, name FROM {table} ORDER BY id').fetchall()
+        entries = sorted((key, row_id) for row_id, name in rows for key in _word_starts(name))
+        self._keys[table] = [key for key, _ in entries]
+        self._ids[table] = [row_id for _, row_id in entries]
+        self._last_ids[table] = rows[-1][0] if rows else 0
+
+    def _extend(self, table: str) -> None:
+        rows = get_connection().execute(f'SELECT id, name FROM {table} WHERE id > ? ORDER BY id LIMIT ?',
+                                        (self._last_ids[table], self.NEW_NAMES_LIMIT + 1)).fetchall()
+        if len(rows) > self.NEW_NAMES_LIMIT:
+            self._load(table)
+            return
+        keys, ids = self._keys[table], self._ids[table]
+        for row_id, name in rows:
+            for key in _word_starts(name):
+                position = bisect.bisect_right(keys, key)
+                keys.insert(position, key)
+                ids.insert(position, row_id)
+            self._last_ids[table] = row_id
+
+    def prefix_ids(self, table: str, prefix: str) -> List[int]:
+        # Identifiants dont un mot du nom commence par le préfixe, dans l'ordre alphabétique des noms
+        token = result_cache.token()
+        with self._lock:
+            if token[0] != (self._token or (None,))[0]:
+                # Autre fichier de base : rien n'est réutilisable
+                self._keys.clear()
+                self._ids.clear()
+            elif token != self._token:
+                for indexed in self._keys:
+                    self._extend(indexed)
+            self._token = token
+            if table not in self._keys:
+                self._load(table)
+            keys = self._keys[table]
+            prefix = prefix.casefold()
+            low = bisect.bisect_left(keys, prefix)
+            # Toutes les clés qui commencent par le préfixe sont < préfixe + le plus grand caractère
+            high = bisect.bisect_left(keys, prefix + '\U0010ffff', low)
+            return list(dict.fromkeys(self._ids[table][low:high]))
+
+name_index = NameIndex()
+
+@instrumented
+def search_appointments_by_prefix(table: str, prefix: str, limit: int = LIVE_SEARCH_LIMIT) -> Tuple[List[Tuple], bool]:
+    # Recherche au fil de la frappe : renvoie (rendez-vous, complet). Un résultat complet peut ensuite
+    # être restreint en mémoire par narrow_appointments() quand le préfixe s'allonge.
+    prefix = prefix.lstrip()
+    if not prefix:
+        return [], False
+    try:
+        ids = name_index.prefix_ids(table, prefix)
+        column = 'patient_name' if table == 'patients' else 'doctor_name'
+        key = 'patient_id' if table == 'patients' else 'doctor_id'
+        rows = get_connection().execute(f'''
+            SELECT {APPOINTMENT_COLUMNS_SQL} FROM appointment_details
+            WHERE {key} IN (SELECT value FROM json_each(?))
+            ORDER BY {column}, starts_at LIMIT ?
+        ''', (json.dumps(ids[:limit + 1]), limit + 1)).fetchall()
+    except sqlite3.Error as err:
+        print(f"Erreur lors de la recherche des rendez-vous: {err}", file=sys.stderr)
+        return [], False
+    complete = len(ids) <= limit and len(rows) <= limit
+    return rows[:limit], complete
+
+def narrow_appointments(appointments: List[Tuple], table: str, prefix: str) -> List[Tuple]:
+    index = APPOINTMENT_COLUMNS.index('patient_name' if table == 'patients' else 'doctor_name')
+    prefix = prefix.lstrip()
+    return [appointment for appointment in appointments if matches_prefix(appointment[index], prefix)]
+
+def _receipt(appointment_id: int) -> str:
+    conn = get_connection()
+    appointment = conn.execute(f'SELECT {APPOINTMENT_COLUMNS_SQL} FROM main.appointment_details WHERE id = ?', (appointment_id,)).fetchone()
+    # Un rendez-vous archivé garde son identifiant : on le cherche dans les archives, des plus récentes aux plus anciennes
+    for year in reversed(archive_years()) if appointment is None else ():
+        schema = _attach_archive(conn, year)
+        appointment = conn.execute(f'SELECT {APPOINTMENT_COLUMNS_SQL} FROM {schema}.appointment_details WHERE id = ?', (appointment_id,)).fetchone()
+        if appointment:
+            break
+
+    if appointment:
+        receipt = f'''
+            Receipt for Appointment ID: {appointment[0]}
+            Patient Name: {appointment[3]}
+            Appointment Date: {appointment[1]}
+            Appointment Time: {appointment[2]}
+            Doctor Name: {appointment[7]}
+            '''
+        return receipt
+    else:
+        return "Rendez-vous non trouvé."
+
+@instrumented
+def generate_receipt(appointment_id: int) -> str:
+    try:
+        return result_cache.get_or_run(('receipt', appointment_id), _receipt, appointment_id)
+    except sqlite3.Error as err:
+        print(f"Erreur lors de la génération du reçu: {err}", file=sys.stderr)
+        return "Erreur lors de la génération du reçu."
+
+@instrumented
+def appointment_statistics(date_from: Optional[str] = None, date_to: Optional[str] = None) -> Dict[str, List[Tuple]]:
+    # Lecture des tables de synthèse : le coût dépend du nombre de jours, médecins et motifs, pas de l'historique
+    today = datetime.date.today()
+    date_from = date_from or (today - datetime.timedelta(days=STATISTICS_DAYS)).isoformat()
+    date_to = date_to or (today + datetime.timedelta(days=STATISTICS_DAYS)).isoformat()
+    try:
+        conn = get_connection()
+        return {
+            'days': conn.execute('''
+                SELECT day, appointments FROM stats_by_day WHERE day BETWEEN ? AND ? AND appointments > 0 ORDER BY day
+            ''', (date_from, date_to)).fetchall(),
+            'doctors': conn.execute('''
+                SELECT d.name, d.specialty, s.appointments FROM stats_by_doctor s JOIN doctors d ON d.id = s.doctor_id
+                WHERE s.appointments > 0 ORDER BY s.appointments DESC, d.name
+            ''').fetchall(),
+            'specialties': conn.execute('''
+                SELECT specialty, appointments FROM stats_by_specialty WHERE appointments > 0 ORDER BY appointments DESC, specialty
+            ''').fetchall(),
+            'reasons': conn.execute('''
+                SELECT reason, appointments FROM stats_by_reason WHERE appointments > 0 ORDER BY appointments DESC, reason
+            ''').fetchall(),
+        }
+    except sqlite3.Error as err:
+        print(f"Erreur lors de la lecture des statistiques: {err}", file=sys.stderr)
+        return {'days': [], 'doctors': [], 'specialties': [], 'reasons': []}
+
+def archive_path(year: int) -> str:
+    return f'{os.path.splitext(database_path)[0]}_archive_{year}.sqlite'
+
+def archive_years() -> List[int]:
+    pattern = glob.escape(os.path.splitext(database_path)[0]) + '_archive_[0-9][0-9][0-9][0-9].sqlite'
+    return sorted(int(path[-len('0000.sqlite'):-len('.sqlite')]) for path in glob.glob(pattern))
+
+def _archive_years_between(date_from: Optional[str], date_to: Optional[str]) -> List[int]:
+    # Sans borne de période, les lectures restent sur la base principale
+    if not date_from and not date_to:
+        return []
+    first_year = int(date_from[:4]) if date_from else 0
+    last_year = int(date_to[:4]) if date_to else 9999
+    return [year for year in archive_years() if first_year <= year <= last_year]
+
+def _attach_archive(conn: sqlite3.Connection, year: int) -> str:
+    # Attache l'archive de l'année en lecture seule, en détachant au besoin la moins récemment utilisée
+    schema = f'archive_{year}'
+    attached = getattr(conn, 'attached_archives', None)
+    if attached is None:
+        attached = conn.attached_archives = OrderedDict()
+    if schema in attached:
+        attached.move_to_end(schema)
+        return schema
+    while len(attached) >= ARCHIVE_ATTACH_LIMIT:
+        conn.execute(f'DETACH DATABASE {attached.popitem(last=False)[0]}')
+    conn.execute(f'ATTACH DATABASE ? AS {schema}', ('file:%s?mode=ro' % urllib.parse.quote(os.path.abspath(archive_path(year))),))
+    attached[schema] = year
+    return schema
+
+def _detach_archive(conn: sqlite3.Connection, year: int) -> None:
+    attached = getattr(conn, 'attached_archives', None)
+    if attached and attached.pop(f'archive_{year}', None) is not None:
+        conn.execute(f'DETACH DATABASE archive_{year}')
+
+def _archive_year(conn: sqlite3.Connection, year: int, start: int, end: int) -> int:
+    _detach_archive(conn, year)
+    conn.execute('ATTACH DATABASE ? AS archive_target', (archive_path(year),))
+    try:
+        # Table à plat : une archive se lit seule, sans les tables patients et doctors de la base principale
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS archive_target.appointment_details (
+                id INTEGER PRIMARY KEY,
+                date TEXT NOT NULL,
+                time TEXT NOT NULL,
+                patient_name TEXT NOT NULL,
+                gender TEXT NOT NULL,
+                age INTEGER NOT NULL,
+                consultation_reason TEXT NOT NULL,
+                doctor_name TEXT NOT NULL,
+                doctor_specialty TEXT NOT NULL,
+                starts_at INTEGER NOT NULL,
+                patient_id INTEGER NOT NULL,
+                doctor_id INTEGER NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS archive_target.idx_archive_starts_at ON appointment_details (starts_at, id)')
+        conn.execute('CREATE INDEX IF NOT EXISTS archive_target.idx_archive_doctor_starts_at ON appointment_details (doctor_id, starts_at)')
+        # En WAL, une transaction sur plusieurs fichiers n'est atomique que fichier par fichier : la copie est
+        # validée seule avant toute suppression. Une interruption entre les deux laisse au pire des rendez-vous
+        # en double, que la prochaine copie remplace (INSERT OR REPLACE), jamais des rendez-vous perdus.
+        for _ in range(ARCHIVE_COPY_ATTEMPTS):
+            with transaction() as conn:
+                conn.execute(f'''
+                    INSERT OR REPLACE INTO archive_target.appointment_details
+                    SELECT {', '.join(SELECTED_COLUMNS)}, patient_id, doctor_id FROM main.appointment_details
+                    WHERE starts_at >= ? AND starts_at < ?
+                ''', (start, end))
+            with transaction() as conn:
+                # Chaque rendez-vous de l'année doit avoir sa copie à l'identique dans l'archive validée
+                total, copied = conn.execute('''
+                    SELECT COUNT(*), COUNT(t.id) FROM main.appointments a
+                    LEFT JOIN archive_target.appointment_details t
+                        ON t.id = a.id AND t.starts_at = a.starts_at AND t.patient_id = a.patient_id
+                        AND t.doctor_id = a.doctor_id AND t.consultation_reason = a.consultation_reason
+                    WHERE a.starts_at >= ? AND a.starts_at < ?
+                ''', (start, end)).fetchone()
+                if total != copied:
+                    # Écriture concurrente entre les deux transactions : recopier
+                    continue
+                # Les rendez-vous archivés restent comptés dans les statistiques : le déclencheur de suppression
+                # est retiré le temps du déplacement, dans la même transaction
+                conn.execute('DROP TRIGGER appointments_stats_delete')
+                conn.execute('DELETE FROM main.appointments WHERE starts_at >= ? AND starts_at < ?', (start, end))
+                conn.execute(_statistics_delete_trigger_sql())
+                return total
+        raise sqlite3.OperationalError(f"copie de l'archive {year} incomplète après {ARCHIVE_COPY_ATTEMPTS} essais")
+    finally:
+        conn.execute('DETACH DATABASE archive_target')
+
+@instrumented
+def archive_appointments(horizon_days: int = ARCHIVE_HORIZON_DAYS, vacuum: bool = True) -> Dict[int, int]:
+    # Déplace, année par année, les rendez-vous antérieurs à l'horizon ; renvoie le nombre déplacé par année
+    cutoff = (datetime.date.today().toordinal() - horizon_days - EPOCH_ORDINAL) * 86400
+    moved: Dict[int, int] = {}
+    try:
+        conn = get_connection()
+        oldest = conn.execute('SELECT MIN(starts_at) FROM appointments').fetchone()[0]
+        if oldest is None or oldest >= cutoff:
+            return moved
+        first_year = datetime.date.fromordinal(EPOCH_ORDINAL + oldest // 86400).year
+        last_year = datetime.date.fromordinal(EPOCH_ORDINAL + (cutoff - 1) // 86400).year
+        for year in range(first_year, last_year + 1):
+            start = (datetime.date(year, 1, 1).toordinal() - EPOCH_ORDINAL) * 86400
+            end = min(cutoff, (datetime.date(year + 1, 1, 1).toordinal() - EPOCH_ORDINAL) * 86400)
+            # Année sans rendez-vous : pas de fichier d'archive vide, que chaque lecture bornée devrait ensuite attacher
+            if conn.execute('SELECT 1 FROM appointments WHERE starts_at >= ? AND starts_at < ? LIMIT 1', (start, end)).fetchone() is None:
+                continue
+            count = _archive_year(conn, year, start, end)
+            if count:
+                moved[year] = count
+        if moved and vacuum:
+            # Rendre au système la place des années déplacées
+            conn.execute('VACUUM')
+    except sqlite3.Error as err:
+        print(f"Erreur lors de l'archivage des rendez-vous: {err}", file=sys.stderr)
+    if moved:
+        result_cache.invalidate()
+        schedule.clear()
+        # Le déplacement a journalisé une suppression par rendez-vous archivé
+        compact_change_log()
+    return moved
+
+def _minutes(time: str) -> Optional[int]:
+    if not TIME_PATTERN.fullmatch(time):
+        return None
+    return int(time[:2]) * 60 + int(time[3:])
+
+class DoctorSchedule:
+    # Index d'intervalles par médecin et par jour : liste triée des débuts de consultation.
+    # Chaque journée est chargée à la demande via l'index (doctor_id, starts_at), puis
+    # oubliée dès qu'une écriture la touche ; une écriture d'une autre connexion vide tout l'index.
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._days: Dict[Tuple[str, str], Tuple[List[int], List[int]]] = {}
+        self._keys_by_id: Dict[int, Tuple[str, str]] = {}
+        self._token: Optional[Tuple[int, int]] = None
+
+    def _check_external_changes(self, conn: sqlite3.Connection) -> None:
+        # data_version change quand une autre connexion (autre thread ou autre processus) valide une écriture
+        token = (id(conn), conn.execute('PRAGMA data_version').fetchone()[0])
+        if token != self._token:
+            self._days.clear()
+            self._keys_by_id.clear()
+            self._token = token
+
+    def _day(self, doctor_name: str, date: str) -> Tuple[List[int], List[int]]:
+        conn = get_connection()
+        self._check_external_changes(conn)
+        key = (doctor_name, date)
+        day = self._days.get(key)
+        if day is None:
+            day_start, day_end = _day_bounds(date)
+            rows = conn.execute('''
+                SELECT starts_at, id FROM appointments
+                WHERE doctor_id IN (SELECT id FROM doctors WHERE name = ?) AND starts_at >= ? AND starts_at < ?
+                ORDER BY starts_at
+            ''', (doctor_name, day_start, day_end)).fetchall()
+            starts = [(starts_at - day_start) // 60 for starts_at, _ in rows]
+            ids = [appointment_id for _, appointment_id in rows]
+            for appointment_id in ids:
+                self._keys_by_id[appointment_id] = key
+            day = self._days[key] = (starts, ids)
+        return day
+
+    def find_conflict(self, doctor_name: str, date: str, time: str, exclude_id: Optional[int] = None) -> Optional[int]:
+        start = _minutes(time)
+        if start is None:
+            return None
+        with self._lock:
+            starts, ids = self._day(doctor_name, date)
+            # Durées identiques : seuls les débuts à moins d'une durée du créneau demandé peuvent le chevaucher
+            low = bisect.bisect_right(starts, start - APPOINTMENT_DURATION)
+            high = bisect.bisect_left(starts, start + APPOINTMENT_DURATION)
+            for position in range(low, high):
+                if ids[position] != exclude_id:
+                    return ids[position]
+        return None
+
+    def is_free(self, doctor_name: str, date: str, start: int) -> bool:
+        return self.find_conflict(doctor_name, date, '%02d:%02d' % divmod(start, 60)) is None
+
+    def next_free_slots(self, doctor_name: Optional[str] = None, doctor_specialty: Optional[str] = None, count: int = 5,
+                        after: Optional[datetime.datetime] = None) -> List[Tuple[str, str, str]]:
+        if count < 1:
+            return []
+        if doctor_name:
+            doctors = [doctor_name]
+        elif doctor_specialty:
+            rows = get_connection().execute('SELECT DISTINCT name FROM doctors WHERE specialty = ? ORDER BY name',
+                                            (doctor_specialty,)).fetchall()
+            doctors = [row[0] for row in rows]
+        else:
+            return []
+        after = after or datetime.datetime.now()
+        slots: List[Tuple[str, str, str]] = []
+        for day_offset in range(FREE_SLOT_HORIZON_DAYS):
+            day = after.date() + datetime.timedelta(days=day_offset)
+            date = day.isoformat()
+            first = WORKING_HOURS[0]
+            if day_offset == 0:
+                now = after.hour * 60 + after.minute
+                first = max(first, -(-now // APPOINTMENT_DURATION) * APPOINTMENT_DURATION)
+            for start in range(first, WORKING_HOURS[1] - APPOINTMENT_DURATION + 1, APPOINTMENT_DURATION):
+                for doctor in doctors:
+                    if self.is_free(doctor, date, start):
+                        slots.append((date, '%02d:%02d' % divmod(start, 60), doctor))
+                        if len(slots) >= count:
+                            return slots
+        return slots
+
+    def forget(self, doctor_name: str, date: str) -> None:
+        with self._lock:
+            self._days.pop((doctor_name, date), None)
+
+    def forget_appointment(self, appointment_id: int) -> None:
+        with self._lock:
+            key = self._keys_by_id.pop(appointment_id, None)
+            if key is not None:
+                self._days.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._days.clear()
+            self._keys_by_id.clear()
+
+schedule = DoctorSchedule()
+
+@instrumented
+def find_conflict(doctor_name: str, date: str, time: str, exclude_id: Optional[int] = None) -> Optional[int]:
+    try:
+        return schedule.find_conflict(doctor_name, date, time, exclude_id)
+    except sqlite3.Error as err:
+        print(f"Erreur lors de la vérification des disponibilités: {err}", file=sys.stderr)
+        return None
+
+@instrumented
+def next_free_slots(doctor_name: Optional[str] = None, doctor_specialty: Optional[str] = None, count: int = 5) -> List[Tuple[str, str, str]]:
+    try:
+        return schedule.next_free_slots(doctor_name, doctor_specialty, count)
+    except sqlite3.Error as err:
+        print(f"Erreur lors de la recherche de créneaux libres: {err}", file=sys.stderr)
+        return []
+
+def validate_appointment(record: Dict) -> Tuple:
+    values = []
+    for field in IMPORT_FIELDS:
+        value = record.get(field)
+        if value is None or str(value).strip() == '':
+            raise ValueError(f"champ manquant: {field}")
+        values.append(str(value).strip())
+    date, time, patient_name, gender, age, consultation_reason, doctor_name, doctor_specialty = values
+    try:
+        if len(date) != 10:
+            raise ValueError
+        datetime.date.fromisoformat(date)
+    except ValueError:
+        raise ValueError(f"date invalide (AAAA-MM-JJ attendu): {date}")
+    if not TIME_PATTERN.fullmatch(time):
+        raise ValueError(f"heure invalide (HH:MM attendu): {time}")
+    try:
+        age = int(age)
+    except ValueError:
+        raise ValueError(f"âge invalide: {age}")
+    if age < 0:
+        raise ValueError(f"âge invalide: {age}")
+    return (date, time, patient_name, gender, age, consultation_reason, doctor_name, doctor_specialty)
+
+def read_import_records(path: str) -> Iterator[Tuple[int, object]]:
+    if path.lower().endswith(('.jsonl', '.ndjson', '.json')):
+        with open(path, encoding='utf-8') as import_file:
+            for line_number, line in enumerate(import_file, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except json.JSONDecodeError as err:
+                    yield line_number, err
+    else:
+        with open(path, newline='', encoding='utf-8-sig') as import_file:
+            reader = csv.DictReader(import_file)
+            for record in reader:
+                yield reader.line_num, record
+
+def _resolve_rows(conn: sqlite3.Connection, rows: List[Tuple]) -> List[Tuple]:
+    # Un même patient ou médecin revient souvent dans un import : ses identifiants sont résolus une seule fois par lot
+    patients: Dict[Tuple, int] = {}
+    doctors: Dict[Tuple, int] = {}
+    resolved = []
+    for date, time, patient_name, gender, age, consultation_reason, doctor_name, doctor_specialty in rows:
+        patient_key = (patient_name, gender, age)
+        patient_id = patients.get(patient_key)
+        if patient_id is None:
+            patient_id = patients[patient_key] = _patient_id(conn, *patient_key)
+        doctor_key = (doctor_name, doctor_specialty)
+        doctor_id = doctors.get(doctor_key)
+        if doctor_id is None:
+            doctor_id = doctors[doctor_key] = _doctor_id(conn, *doctor_key)
+        resolved.append((_timestamp(date, time), patient_id, doctor_id, consultation_reason))
+    return resolved
+
+@contextmanager
+def _batched_derived_tables(conn: sqlite3.Connection) -> Iterator[None]:
+    # Indexer les nouveaux noms, compter et journaliser les nouveaux rendez-vous en une requête groupée est bien
+    # plus rapide que les déclencheurs ligne par ligne. Ils sont supprimés puis recréés dans la même transaction :
+    # les autres connexions ne voient rien.
+    tables = ('patients', 'doctors') if fts_enabled else ()
+    last_ids = {}
+    for table in tables + ('appointments',):
+        last_ids[table] = conn.execute(f'SELECT COALESCE(MAX(id), 0) FROM {table}').fetchone()[0]
+    for table in tables:
+        conn.execute(f'DROP TRIGGER {table}_fts_insert')
+    conn.execute('DROP TRIGGER appointments_stats_insert')
+    conn.execute('DROP TRIGGER appointments_log_insert')
+    yield
+    for table in tables:
+        conn.execute(f'INSERT INTO {table}_fts (rowid, name) SELECT id, name FROM {table} WHERE id > ?', (last_ids[table],))
+        conn.execute(_fts_insert_trigger_sql(table))
+    _credit_statistics(conn, 'AND a.id > ?', (last_ids['appointments'],))
+    conn.execute(_statistics_insert_trigger_sql())
+    conn.execute('''
+        INSERT INTO change_log (appointment_id, operation) SELECT id, 'insert' FROM appointments WHERE id > ? ORDER BY id
+    ''', (last_ids['appointments'],))
+    conn.execute(_change_log_trigger_sql('insert'))
+
+def _insert_batch(batch: List[Tuple[int, Tuple]], rejects: List[Tuple[int, str]]) -> int:
+    try:
+        with transaction() as conn, _batched_derived_tables(conn):
+            conn.executemany(INSERT_APPOINTMENT_SQL, _resolve_rows(conn, [values for _, values in batch]))
+        return len(batch)
+    except sqlite3.IntegrityError:
+        pass
+    # Le lot a échoué : on le rejoue ligne par ligne pour isoler les lignes refusées
+    inserted = 0
+    with transaction() as conn:
+        for line_number, values in batch:
+            try:
+                with transaction():
+                    conn.executemany(INSERT_APPOINTMENT_SQL, _resolve_rows(conn, [values]))
+                inserted += 1
+            except sqlite3.IntegrityError as err:
+                rejects.append((line_number, str(err)))
+    return inserted
+
+@instrumented
+def import_records(records: Iterable[Tuple[int, object]], batch_size: int = IMPORT_BATCH_SIZE) -> Tuple[int, List[Tuple[int, str]]]:
+    # Enregistrements déjà lus, avec leur numéro de ligne : fichier local ou envoyés au service par un poste
+    imported = 0
+    rejects: List[Tuple[int, str]] = []
+    batch: List[Tuple[int, Tuple]] = []
+    try:
+        for line_number, record in records:
+            if isinstance(record, Exception):
+                rejects.append((line_number, f"JSON invalide: {record}"))
+                continue
+            if not isinstance(record, dict):
+                rejects.append((line_number, "objet JSON attendu"))
+                continue
+            try:
+                batch.append((line_number, validate_appointment(record)))
+            except ValueError as err:
+                rejects.append((line_number, str(err)))
+                continue
+            if len(batch) >= batch_size:
+                imported += _insert_batch(batch, rejects)
+                batch = []
+        if batch:
+            imported += _insert_batch(batch, rejects)
+    except sqlite3.Error as err:
+        print(f"Erreur lors de l'import des rendez-vous: {err}", file=sys.stderr)
+    finally:
+        # Même interrompu par une erreur de lecture, les lots déjà validés doivent être visibles
+        if imported:
+            result_cache.invalidate()
+            schedule.clear()
+    return imported, rejects
+
+@instrumented
+def import_appointments(path: str, batch_size: int = IMPORT_BATCH_SIZE) -> Tuple[int, List[Tuple[int, str]]]:
+    # Un fichier absent ou illisible lève OSError (ou csv.Error, UnicodeDecodeError) : ce n'est pas un import vide
+    return import_records(read_import_records(path), batch_size)
@@ -0,0 +1,319 @@
+# Instrumentation des accès aux données : nombre d'appels, histogramme des latences, lignes renvoyées,
+# attente des verrous, journal des requêtes lentes avec leur plan d'exécution, export JSON ou HTTP local.
+# Bibliothèque standard uniquement, comme rendezvous_core.
+import atexit
+import collections
+import functools
+import inspect
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+# Seuil au-delà duquel un appel est écrit dans le journal des requêtes lentes, en millisecondes
+SLOW_QUERY_MS = float(os.environ.get('RENDEZVOUS_SLOW_QUERY_MS', 100))
+slow_query_log_path = os.environ.get('RENDEZVOUS_SLOW_QUERY_LOG', 'slow_queries.log')
+# Bornes supérieures des classes de l'histogramme des latences, en millisecondes
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float('inf'))
+# Nombre de requêtes SQL mémorisées par thread pour expliquer un appel lent
+RECENT_STATEMENTS = 8
+EXPLAINED_STATEMENTS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'REPLACE')
+
+_lock = threading.Lock()
+_local = threading.local()
+_started_at = time.time()
+
+class FunctionStats:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.rows = 0
+        self.lock_wait_seconds = 0.0
+        self.histogram = [0] * len(LATENCY_BUCKETS_MS)
+
+    def record(self, seconds: float, rows: Optional[int]) -> None:
+        self.calls += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        if rows is not None:
+            self.rows += rows
+        milliseconds = seconds * 1000
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if milliseconds <= bound:
+                self.histogram[index] += 1
+                break
+
+    def percentile_ms(self, fraction: float) -> Optional[float]:
+        # Estimation par la borne supérieure de la classe qui contient le centile
+        if not self.calls:
+            return None
+        threshold = fraction * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.histogram):
+            seen += count
+            if seen >= threshold:
+                return bound if bound != float('inf') else round(self.max_seconds * 1000, 3)
+        return round(self.max_seconds * 1000, 3)
+
+    def to_dict(self) -> Dict:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'total_ms': round(self.total_seconds * 1000, 3),
+            'mean_ms': round(self.total_seconds * 1000 / self.calls, 3) if self.calls else None,
+            'max_ms': round(self.max_seconds * 1000, 3),
+            'p50_ms': self.percentile_ms(0.50),
+            'p95_ms': self.percentile_ms(0.95),
+            'p99_ms': self.percentile_ms(0.99),
+            'rows': self.rows,
+            'lock_wait_ms': round(self.lock_wait_seconds * 1000, 3),
+            'histogram_ms': {('<=%g' % bound if bound != float('inf') else '>%g' % LATENCY_BUCKETS_MS[-2]): count
+                             for bound, count in zip(LATENCY_BUCKETS_MS, self.histogram)},
+        }
+
+_stats: Dict[str, FunctionStats] = collections.defaultdict(FunctionStats)
+
+def _current_calls() -> List[str]:
+    calls = getattr(_local, 'calls', None)
+    if calls is None:
+        calls = _local.calls = []
+    return calls
+
+def _recent_statements() -> Deque[Tuple]:
+    statements = getattr(_local, 'statements', None)
+    if statements is None:
+        statements = _local.statements = collections.deque(maxlen=RECENT_STATEMENTS)
+        _local.statement_count = 0
+    return statements
+
+def _remember_statement(conn: sqlite3.Connection, sql: str, parameters, seconds: float) -> None:
+    statements = _recent_statements()
+    _local.statement_count += 1
+    statements.append((_local.statement_count, conn, sql, parameters, seconds))
+
+class InstrumentedConnection(sqlite3.Connection):
+    # Connexion qui mémorise les dernières requêtes du thread et leur durée d'exécution,
+    # pour pouvoir les expliquer si l'appel qui les a lancées s'avère lent
+    def execute(self, sql: str, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        except sqlite3.Error:
+            record_error()
+            raise
+        finally:
+            _remember_statement(self, sql, parameters, time.perf_counter() - started)
+
+    def executemany(self, sql: str, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        except sqlite3.Error:
+            record_error()
+            raise
+        finally:
+            # Seul le premier jeu de paramètres sert à expliquer la requête
+            first = seq_of_parameters[0] if isinstance(seq_of_parameters, (list, tuple)) and seq_of_parameters else None
+            _remember_statement(self, sql, first, time.perf_counter() - started)
+
+def record_error() -> None:
+    calls = _current_calls()
+    if calls:
+        with _lock:
+            _stats[calls[-1]].errors += 1
+
+def record_lock_wait(seconds: float) -> None:
+    # Temps passé à obtenir le verrou d'écriture (BEGIN IMMEDIATE attend jusqu'à busy_timeout)
+    calls = _current_calls()
+    with _lock:
+        _stats[calls[-1] if calls else 'transaction'].lock_wait_seconds += seconds
+
+def _count_rows(result) -> Optional[int]:
+    if isinstance(result, list):
+        return len(result)
+    return None
+
+def _explain(statements: List[Tuple]) -> List[str]:
+    lines = []
+    for _, conn, sql, parameters, seconds in statements:
+        lines.append('  [%.3f ms] %s' % (seconds * 1000, ' '.join(sql.split())))
+        if parameters:
+            lines.append('    paramètres: %r' % (parameters,))
+        if sql.lstrip().split(None, 1)[0].upper() not in EXPLAINED_STATEMENTS:
+            continue
+        try:
+            # Appel direct à sqlite3.Connection.execute : le plan n'est pas lui-même mémorisé
+            plan = sqlite3.Connection.execute(conn, 'EXPLAIN QUERY PLAN ' + sql, parameters or ()).fetchall()
+        except sqlite3.Error as err:
+            lines.append(f'    plan indisponible: {err}')
+            continue
+        for row in plan:
+            lines.append('    ' + row[-1])
+    return lines
+
+def _log_slow_call(name: str, seconds: float, rows: Optional[int], statements: List[Tuple]) -> None:
+    lines = ['%s %s %.1f ms%s' % (time.strftime('%Y-%m-%d %H:%M:%S'), name, seconds * 1000,
+                                   f' ({rows} lignes)' if rows is not None else '')]
+    lines.extend(_explain(statements))
+    try:
+        with _lock, open(slow_query_log_path, 'a', encoding='utf-8') as log_file:
+            log_file.write('\n'.join(lines) + '\n')
+    except OSError as err:
+        print(f"Erreur lors de l'écriture du journal des requêtes lentes: {err}", file=sys.stderr)
+
+def _finish(name: str, seconds: float, rows: Optional[int], first_statement: int) -> None:
+    with _lock:
+        _stats[name].record(seconds, rows)
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        statements = [statement for statement in _recent_statements() if statement[0] > first_statement]
+        _log_slow_call(name, seconds, rows, statements)
+
+def instrumented(func: Callable) -> Callable:
+    name = func.__name__
+
+    def begin() -> Tuple[float, int]:
+        _recent_statements()
+        _current_calls().append(name)
+        return time.perf_counter(), _local.statement_count
+
+    if inspect.isgeneratorfunction(func):
+        # Générateur : seul le temps passé à produire les lignes compte, pas celui du consommateur
+        @functools.wraps(func)
+        def generator_wrapper(*args, **kwargs):
+            # Le nom n'est empilé que pendant la production d'une ligne : le générateur peut être repris
+            # depuis un autre thread que celui qui l'a créé
+            _recent_statements()
+            first_statement = _local.statement_count
+            generator = func(*args, **kwargs)
+            elapsed = 0.0
+            rows = 0
+            try:
+                while True:
+                    calls = _current_calls()
+                    calls.append(name)
+                    started = time.perf_counter()
+                    try:
+                        row = next(generator)
+                    except StopIteration:
+                        break
+                    finally:
+                        elapsed += time.perf_counter() - started
+                        calls.pop()
+                    rows += 1
+                    yield row
+            finally:
+                # Aussi quand le consommateur s'arrête avant la fin (une page de la grille, --limit)
+                generator.close()
+                _finish(name, elapsed, rows, first_statement)
+        return generator_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started, first_statement = begin()
+        rows = None
+        try:
+            result = func(*args, **kwargs)
+            rows = _count_rows(result)
+            return result
+        except Exception as err:
+            # Les erreurs SQLite sont déjà comptées par InstrumentedConnection
+            if not isinstance(err, sqlite3.Error):
+                with _lock:
+                    _stats[name].errors += 1
+            raise
+        finally:
+            _current_calls().pop()
+            _finish(name, time.perf_counter() - started, rows, first_statement)
+    return wrapper
+
+def snapshot() -> Dict:
+    with _lock:
+        functions = {name: stats.to_dict() for name, stats in sorted(_stats.items())}
+    return {
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(_started_at)),
+        'uptime_seconds': round(time.time() - _started_at, 1),
+        'slow_query_ms': SLOW_QUERY_MS,
+        'functions': functions,
+    }
+
+def reset() -> None:
+    with _lock:
+        _stats.clear()
+
+def write_metrics(path: str) -> None:
+    try:
+        with open(path, 'w', encoding='utf-8') as metrics_file:
+            json.dump(snapshot(), metrics_file, indent=2, ensure_ascii=False)
+    except OSError as err:
+        print(f"Erreur lors de l'écriture des métriques: {err}", file=sys.stderr)
+
+def serve_metrics(port: int, host: str = '127.0.0.1'):
+    # Point d'accès local GET /metrics, servi par un thread démon
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.rstrip('/') != '/metrics':
+                self.send_error(404)
+                return
+            body = json.dumps(snapshot(), ensure_ascii=False).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
+
+# Profilage optionnel des callbacks de l'interface : RENDEZVOUS_PROFILE=fichier.prof
+_profiler = None
+_profile_depth = 0
+
+def profiled(callback: Callable) -> Callable:
+    if _profiler is None:
+        return callback
+
+    @functools.wraps(callback)
+    def wrapper(*args, **kwargs):
+        # Les callbacks Tk s'exécutent tous dans le thread principal : un seul profileur suffit,
+        # activé par le callback le plus externe
+        global _profile_depth
+        if _profile_depth:
+            return callback(*args, **kwargs)
+        _profile_depth += 1
+        _profiler.enable()
+        try:
+            return callback(*args, **kwargs)
+        finally:
+            _profiler.disable()
+            _profile_depth -= 1
+    return wrapper
+
+def configure_from_environment() -> None:
+    # RENDEZVOUS_METRICS_FILE : métriques écrites à la sortie ; RENDEZVOUS_METRICS_PORT : point d'accès HTTP
+    global _profiler
+    metrics_file = os.environ.get('RENDEZVOUS_METRICS_FILE')
+    if metrics_file:
+        atexit.register(write_metrics, metrics_file)
+    metrics_port = os.environ.get('RENDEZVOUS_METRICS_PORT')
+    if metrics_port:
+        try:
+            serve_metrics(int(metrics_port))
+        except (OSError, ValueError) as err:
+            print(f"Impossible de démarrer le point d'accès des métriques: {err}", file=sys.stderr)
+    profile_file = os.environ.get('RENDEZVOUS_PROFILE')
+    if profile_file and _profiler is None:
+        import cProfile
+
+        _profiler = cProfile.Profile()
+        atexit.register(_profiler.dump_stats, profile_file)
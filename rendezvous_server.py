@@ -0,0 +1,336 @@
+# Service HTTP/JSON local : les postes d'accueil partagent la base à travers un seul processus au lieu
+# d'ouvrir chacun le fichier SQLite. Les écritures passent toutes par un thread et une connexion uniques,
+# et celles qui arrivent ensemble sont validées par un seul COMMIT ; les lectures sont servies par un
+# groupe de threads ayant chacun sa connexion. Bibliothèque standard uniquement (asyncio).
+import asyncio
+import json
+import re
+import sqlite3
+import sys
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Callable, Dict, List, Optional, Tuple
+
+import rendezvous_core as core
+import rendezvous_metrics as metrics
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+# Threads (et donc connexions) servant les lectures
+READ_WORKERS = 4
+# Nombre maximal d'écritures validées par un même COMMIT
+WRITE_BATCH_SIZE = 100
+MAX_BODY_SIZE = 1 << 20
+
+class HttpError(Exception):
+    def __init__(self, status: HTTPStatus, message: str, **details) -> None:
+        super().__init__(message)
+        self.status = status
+        self.details = details
+
+def int_param(values: Dict, name: str, default: Optional[int] = None, minimum: int = 1) -> int:
+    # Paramètre entier de la requête (texte) ou du corps (JSON) ; toute autre valeur est une erreur 400
+    value = values.get(name, default)
+    if value is None:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"champ manquant: {name}")
+    if isinstance(value, str) and re.fullmatch(r'-?\d+', value.strip()):
+        value = int(value)
+    if not isinstance(value, int) or isinstance(value, bool) or value < minimum:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"{name} : entier supérieur ou égal à {minimum} attendu")
+    return value
+
+def appointment_to_dict(appointment: Tuple) -> Dict:
+    return dict(zip(core.APPOINTMENT_COLUMNS, appointment))
+
+class WriteBatcher:
+    # File des écritures. Le thread d'écriture prend tout ce qui attend (jusqu'à WRITE_BATCH_SIZE) et
+    # l'exécute dans une seule transaction : chaque écriture y a son point de sauvegarde (transaction()
+    # imbriquée), donc une écriture refusée n'annule pas les autres.
+    def __init__(self) -> None:
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-writer')
+
+    async def submit(self, function: Callable, *args, batchable: bool = True):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((function, args, batchable, future))
+        return await future
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        pending = None
+        while True:
+            batch = [pending or await self.queue.get()]
+            pending = None
+            # Un import gère lui-même ses transactions par lots : il passe seul, au lot suivant
+            while batch[0][2] and len(batch) < WRITE_BATCH_SIZE and not self.queue.empty():
+                item = self.queue.get_nowait()
+                if not item[2]:
+                    pending = item
+                    break
+                batch.append(item)
+            results = await loop.run_in_executor(self.executor, self._apply, batch)
+            for (_, _, _, future), (result, error) in zip(batch, results):
+                if future.cancelled():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+    def _apply(self, batch: List[Tuple]) -> List[Tuple]:
+        if len(batch) == 1 and not batch[0][2]:
+            function, args, _, _ = batch[0]
+            try:
+                return [(function(*args), None)]
+            except Exception as err:
+                return [(None, err)]
+        results = []
+        try:
+            with core.transaction():
+                for function, args, _, _ in batch:
+                    try:
+                        results.append((function(*args), None))
+                    except Exception as err:
+                        results.append((None, err))
+        except sqlite3.Error as err:
+            # Le COMMIT commun a échoué : aucune écriture du lot n'a été enregistrée
+            conn = core.get_connection()
+            if conn.in_transaction:
+                conn.rollback()
+            core.result_cache.invalidate()
+            core.schedule.clear()
+            return [(None, err)] * len(batch)
+        return results
+
+def _checked_add(values: Tuple, allow_conflict: bool) -> Dict:
+    # Vérification et insertion dans le thread d'écriture : deux postes ne peuvent pas réserver le même créneau
+    date, time, _, _, _, _, doctor_name, _ = values
+    if not allow_conflict:
+        conflict_id = core.find_conflict(doctor_name, date, time)
+        if conflict_id is not None:
+            raise HttpError(HTTPStatus.CONFLICT, "créneau déjà occupé", conflict_id=conflict_id)
+    appointment_id = core.add_appointment(*values)
+    if appointment_id is None:
+        raise HttpError(HTTPStatus.INTERNAL_SERVER_ERROR, "échec de l'ajout")
+    return {'id': appointment_id}
+
+def _checked_modify(appointment_id: int, values: Tuple, allow_conflict: bool) -> Dict:
+    date, time, _, _, _, _, doctor_name, _ = values
+    if not allow_conflict:
+        conflict_id = core.find_conflict(doctor_name, date, time, appointment_id)
+        if conflict_id is not None:
+            raise HttpError(HTTPStatus.CONFLICT, "créneau déjà occupé", conflict_id=conflict_id)
+    if core.modify_appointment(appointment_id, *values) is None:
+        raise HttpError(HTTPStatus.NOT_FOUND, "rendez-vous introuvable ou échec de la modification")
+    return {'id': appointment_id}
+
+class AppointmentService:
+    def __init__(self) -> None:
+        self.readers = ThreadPoolExecutor(max_workers=READ_WORKERS, thread_name_prefix='db-reader')
+        self.writes = WriteBatcher()
+        self.routes: List[Tuple[str, re.Pattern, Callable]] = [
+            ('GET', re.compile(r'/appointments'), self.list_appointments),
+            ('POST', re.compile(r'/appointments'), self.add),
+            ('PUT', re.compile(r'/appointments/(\d+)'), self.modify),
+            ('DELETE', re.compile(r'/appointments/(\d+)'), self.delete),
+            ('GET', re.compile(r'/appointments/(\d+)/receipt'), self.receipt),
+            ('GET', re.compile(r'/search'), self.search),
+            ('GET', re.compile(r'/search/prefix'), self.search_prefix),
+            ('GET', re.compile(r'/conflict'), self.conflict),
+            ('GET', re.compile(r'/free-slots'), self.free_slots),
+            ('GET', re.compile(r'/stats'), self.stats),
+            ('GET', re.compile(r'/changes'), self.changes),
+            ('POST', re.compile(r'/import'), self.import_records),
+            ('GET', re.compile(r'/metrics'), self.metrics),
+        ]
+
+    async def read(self, function: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.readers, function, *args)
+
+    # Lectures
+
+    async def list_appointments(self, query: Dict[str, str], body: Dict) -> Dict:
+        # Sans état côté serveur : le client renvoie dans after la clé de la dernière ligne reçue (JSON) avec
+        # les mêmes filtres, et la lecture reprend par clé ; une vue restée ouverte longtemps peut toujours défiler
+        limit = int_param(query, 'limit', core.PAGE_SIZE)
+        order_by = query.get('order_by', 'date')
+        if order_by not in core.SORT_COLUMNS:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"Colonne de tri non prise en charge: {order_by}")
+        after = json.loads(query['after']) if 'after' in query else None
+        if after is not None and not (isinstance(after, list) and all(isinstance(value, (str, int)) for value in after)):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "after : liste JSON attendue")
+        appointments, next_after = await self.read(
+            core.appointments_page, order_by, query.get('descending') == 'true', query.get('date_from'), query.get('date_to'),
+            query.get('doctor_name'), query.get('doctor_specialty'), limit, after)
+        return {'appointments': [appointment_to_dict(row) for row in appointments], 'after': next_after}
+
+    async def receipt(self, query: Dict[str, str], body: Dict, appointment_id: str) -> Dict:
+        return {'id': int(appointment_id), 'receipt': await self.read(core.generate_receipt, int(appointment_id))}
+
+    async def search(self, query: Dict[str, str], body: Dict) -> Dict:
+        if 'doctor' in query:
+            function, text = core.search_appointments_by_doctor, query['doctor']
+        elif 'patient' in query:
+            function, text = core.search_appointments_by_patient, query['patient']
+        else:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "paramètre patient ou doctor attendu")
+        appointments = await self.read(function, text, query.get('date_from'), query.get('date_to'))
+        return {'appointments': [appointment_to_dict(row) for row in appointments]}
+
+    async def search_prefix(self, query: Dict[str, str], body: Dict) -> Dict:
+        target = query.get('target', 'patients')
+        if target not in ('patients', 'doctors'):
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"cible inconnue: {target}")
+        appointments, complete = await self.read(core.search_appointments_by_prefix, target, query.get('q', ''),
+                                                 int_param(query, 'limit', core.LIVE_SEARCH_LIMIT))
+        return {'appointments': [appointment_to_dict(row) for row in appointments], 'complete': complete}
+
+    async def conflict(self, query: Dict[str, str], body: Dict) -> Dict:
+        exclude_id = int_param(query, 'exclude_id') if query.get('exclude_id') else None
+        conflict_id = await self.read(core.find_conflict, query.get('doctor_name', ''), query.get('date', ''),
+                                      query.get('time', ''), exclude_id)
+        return {'conflict_id': conflict_id}
+
+    async def free_slots(self, query: Dict[str, str], body: Dict) -> Dict:
+        slots = await self.read(core.next_free_slots, query.get('doctor_name'), query.get('doctor_specialty'), int_param(query, 'count', 5))
+        return {'slots': [{'date': date, 'time': time, 'doctor_name': doctor_name} for date, time, doctor_name in slots]}
+
+    async def stats(self, query: Dict[str, str], body: Dict) -> Dict:
+        statistics = await self.read(core.appointment_statistics, query.get('date_from'), query.get('date_to'))
+        return {key: [list(row) for row in rows] for key, rows in statistics.items()}
+
+    async def changes(self, query: Dict[str, str], body: Dict) -> Dict:
+        # Sans since : position actuelle du journal, à retenir avant un chargement complet
+        if 'since' not in query:
+            return {'position': await self.read(core.change_log_position)}
+        position, changes = await self.read(core.changes_since, int_param(query, 'since', minimum=0),
+                                            int_param(query, 'limit', core.CHANGES_LIMIT))
+        if changes is None:
+            return {'position': position, 'changes': None}
+        return {'position': position, 'changes': [{'id': appointment_id, 'appointment': appointment and appointment_to_dict(appointment)}
+                                                  for appointment_id, appointment in changes.items()]}
+
+    async def metrics(self, query: Dict[str, str], body: Dict) -> Dict:
+        return metrics.snapshot()
+
+    # Écritures
+
+    def _values(self, body: Dict) -> Tuple:
+        try:
+            return core.validate_appointment(body)
+        except ValueError as err:
+            raise HttpError(HTTPStatus.BAD_REQUEST, str(err))
+
+    async def add(self, query: Dict[str, str], body: Dict) -> Dict:
+        return await self.writes.submit(_checked_add, self._values(body), bool(body.get('allow_conflict')))
+
+    async def modify(self, query: Dict[str, str], body: Dict, appointment_id: str) -> Dict:
+        return await self.writes.submit(_checked_modify, int(appointment_id), self._values(body), bool(body.get('allow_conflict')))
+
+    async def delete(self, query: Dict[str, str], body: Dict, appointment_id: str) -> Dict:
+        await self.writes.submit(core.delete_appointment, int(appointment_id))
+        return {'deleted': int(appointment_id)}
+
+    async def import_records(self, query: Dict[str, str], body: Dict) -> Dict:
+        # Le poste lit son fichier et envoie les lignes par morceaux : le service n'ouvre jamais un chemin reçu
+        records = body.get('records')
+        if not isinstance(records, list) or not all(isinstance(item, list) and len(item) == 2 and isinstance(item[0], int)
+                                                    for item in records):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "records : liste de [ligne, objet] attendue")
+        imported, rejects = await self.writes.submit(core.import_records, [tuple(item) for item in records],
+                                                     int_param(body, 'batch_size', core.IMPORT_BATCH_SIZE), batchable=False)
+        return {'imported': imported, 'rejected': [{'line': line_number, 'reason': reason} for line_number, reason in rejects]}
+
+    # HTTP
+
+    async def dispatch(self, method: str, target: str, raw_body: bytes) -> Tuple[HTTPStatus, Dict]:
+        url = urllib.parse.urlsplit(target)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            match = pattern.fullmatch(url.path.rstrip('/') or '/')
+            if not match:
+                continue
+            allowed = True
+            if route_method != method:
+                continue
+            try:
+                body = json.loads(raw_body) if raw_body else {}
+                if not isinstance(body, dict):
+                    raise HttpError(HTTPStatus.BAD_REQUEST, "objet JSON attendu")
+                return HTTPStatus.OK, await handler(query, body, *match.groups())
+            except HttpError as err:
+                return err.status, {'error': str(err), **err.details}
+            except (ValueError, KeyError) as err:
+                return HTTPStatus.BAD_REQUEST, {'error': f"requête invalide: {err}"}
+            except sqlite3.Error as err:
+                return HTTPStatus.SERVICE_UNAVAILABLE, {'error': f"Erreur lors de l'accès à la base de données: {err}"}
+            except Exception as err:
+                # Toute autre erreur reçoit une réponse : sinon la connexion se fermerait sans un mot
+                print(f"Erreur interne sur {method} {url.path}: {err!r}", file=sys.stderr)
+                return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f"erreur interne: {err}"}
+        if allowed:
+            return HTTPStatus.METHOD_NOT_ALLOWED, {'error': "méthode non autorisée"}
+        return HTTPStatus.NOT_FOUND, {'error': "ressource inconnue"}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # HTTP/1.1 minimal avec connexions persistantes : chaque poste garde sa connexion ouverte
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY_SIZE:
+                    status, payload = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {'error': "requête trop volumineuse"}
+                    keep_alive = False
+                else:
+                    raw_body = await reader.readexactly(length)
+                    status, payload = await self.dispatch(method, target, raw_body)
+                    keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                writer.write((f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+                              f'Content-Type: application/json; charset=utf-8\r\n'
+                              f'Content-Length: {len(data)}\r\n'
+                              f'{"" if keep_alive else "Connection: close" + chr(13) + chr(10)}\r\n').encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> None:
+        writer_task = asyncio.create_task(self.writes.run())
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Service des rendez-vous à l'écoute sur http://{host}:{server.sockets[0].getsockname()[1]}", file=sys.stderr)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            writer_task.cancel()
+
+    def close(self) -> None:
+        self.readers.shutdown()
+        self.writes.executor.shutdown()
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+    core.create_database_and_table()
+    service = AppointmentService()
+    try:
+        asyncio.run(service.serve(host, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+        core.close_connections()
@@ -0,0 +1,19 @@
+# Les tests importent les modules depuis la racine du dépôt, comme le banc d'essai
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import rendezvous_core as core  # noqa: E402
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    # Base neuve par test ; le pool, le cache des résultats et l'index des créneaux sont remis à zéro
+    core.close_connections()
+    core.schedule.clear()
+    monkeypatch.setattr(core, 'database_path', str(tmp_path / 'appointments.sqlite'))
+    monkeypatch.setattr(core, 'auto_compact_change_log', False)
+    yield core.database_path
+    core.close_connections()
+    core.schedule.clear()
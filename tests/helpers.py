@@ -0,0 +1,22 @@
+# Aides partagées par les tests de la base
+import sqlite3
+
+import rendezvous_core as core
+
+APPOINTMENT = ('2026-03-02', '09:00', 'KAGAMBEGA RENE', 'Homme', 20, 'MALADE', 'ERIC', 'GENICOLOGUE')
+
+def add(date: str = APPOINTMENT[0], time: str = APPOINTMENT[1], patient_name: str = APPOINTMENT[2],
+        reason: str = APPOINTMENT[5], doctor_name: str = APPOINTMENT[6], specialty: str = APPOINTMENT[7]) -> int:
+    appointment_id = core.add_appointment(date, time, patient_name, 'Homme', 20, reason, doctor_name, specialty)
+    assert appointment_id is not None
+    return appointment_id
+
+def statistics(conn: sqlite3.Connection) -> dict:
+    # Comptes non nuls des tables de synthèse, par table
+    return {table: dict(conn.execute(f'SELECT {key}, appointments FROM {table} WHERE appointments > 0'))
+            for table, key, _, _ in core.STATISTICS_TABLES}
+
+def recount(conn: sqlite3.Connection) -> dict:
+    # Mêmes comptes recalculés depuis la table appointments
+    return {table: dict(conn.execute(f'SELECT {expression.format(row="a")}, COUNT(*) FROM appointments a GROUP BY 1'))
+            for table, _, _, expression in core.STATISTICS_TABLES}
@@ -0,0 +1,40 @@
+import rendezvous_core as core
+from helpers import add, statistics
+
+def test_archived_appointments_stay_readable_and_counted(database):
+    core.create_database_and_table()
+    conn = core.get_connection()
+    current = add()
+    old = [add(date=f'2015-0{month}-04', reason='VACCIN') for month in range(1, 4)]
+    older = add(date='2014-12-31', patient_name='ZONGO ISSA')
+    before = statistics(conn)
+
+    # Les rendez-vous archivés quittent la base principale mais restent comptés
+    assert core.archive_appointments(vacuum=False) == {2014: 1, 2015: 3}
+    assert core.archive_years() == [2014, 2015]
+    assert [row[0] for row in conn.execute('SELECT id FROM appointments')] == [current]
+    assert statistics(conn) == before
+    assert core.archive_appointments(vacuum=False) == {}
+
+    # Une borne de période fait lire les archives, fusionnées dans l'ordre demandé
+    assert [row[0] for row in core.iter_appointments(date_to='2015-12-31')] == [older] + old
+    assert [row[0] for row in core.iter_appointments(date_from='2015-02-01', descending=True)] == [current] + old[:0:-1]
+    assert [row[0] for row in core.iter_appointments()] == [current]
+    assert [row[0] for row in core.search_appointments_by_patient('ZONGO', date_from='2014-01-01')] == [older]
+    assert core.generate_receipt(old[0]).split('\n')[1].strip() == f'Receipt for Appointment ID: {old[0]}'
+
+    # Après l'archivage, le déclencheur de suppression compte de nouveau
+    assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'appointments_stats_delete'").fetchone()
+    core.delete_appointment(current)
+    before['stats_by_day'].pop('2026-03-02')
+    before['stats_by_reason']['MALADE'] -= 1
+    before['stats_by_doctor'][1] -= 1
+    before['stats_by_specialty']['GENICOLOGUE'] -= 1
+    assert statistics(conn) == before
+
+def test_identifiers_are_not_reused_after_archiving(database):
+    core.create_database_and_table()
+    add()
+    last = add(date='2015-01-04')
+    core.archive_appointments(vacuum=False)
+    assert add() == last + 1
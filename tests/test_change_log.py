@@ -0,0 +1,39 @@
+import rendezvous_core as core
+from helpers import add
+
+def test_changes_since_after_compaction(database):
+    core.create_database_and_table()
+    old_ids = [add(time=f'0{hour}:00') for hour in range(8, 10)]
+    conn = core.get_connection()
+    # Entrées vieillies au-delà de la durée de conservation
+    conn.execute('UPDATE change_log SET changed_at = changed_at - ?', ((core.CHANGE_LOG_RETENTION_DAYS + 1) * 86400,))
+    start = core.change_log_position()
+    recent = add(time='11:00')
+    core.delete_appointment(old_ids[0])
+
+    assert core.compact_change_log() == 2
+    position = core.change_log_position()
+    assert position == start + 2
+    # Les positions compactées ne suffisent plus : rechargement complet demandé
+    assert core.changes_since(0) == (position, None)
+    assert core.changes_since(start - 1) == (position, None)
+    # Les positions encore couvertes par le journal donnent l'état actuel des rendez-vous touchés
+    current = {row[0]: row for row in core.iter_appointments()}
+    assert core.changes_since(start) == (position, {recent: current[recent], old_ids[0]: None})
+    assert core.changes_since(position) == (position, {})
+    # Une position inconnue (autre base) ne doit pas être prise pour « rien de nouveau »
+    assert core.changes_since(position + 10) == (position, None)
+
+def test_changes_since_reports_each_touched_appointment(database):
+    core.create_database_and_table()
+    start = core.change_log_position()
+    first = add()
+    second = add(time='10:00')
+    core.modify_appointment(first, '2026-03-02', '11:00', 'KAGAMBEGA RENE', 'Homme', 20, 'VACCIN', 'ERIC', 'GENICOLOGUE')
+    core.delete_appointment(second)
+    position, changes = core.changes_since(start)
+    assert position == start + 4
+    assert changes == {first: next(core.iter_appointments()), second: None}
+    # Plus de limit rendez-vous touchés : rechargement complet demandé
+    assert core.changes_since(start, limit=1) == (position, None)
+    assert core.changes_since(start, limit=2)[1] == changes
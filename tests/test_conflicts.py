@@ -0,0 +1,63 @@
+import datetime
+
+import pytest
+
+import rendezvous_core as core
+
+APPOINTMENT = ('2026-03-02', '09:00', 'KAGAMBEGA RENE', 'Homme', 20, 'MALADE', 'ERIC', 'GENICOLOGUE')
+
+def fields(**changes) -> dict:
+    # Champs tels que saisis dans le formulaire (texte, espaces éventuels)
+    record = dict(zip(core.IMPORT_FIELDS, (str(value) for value in APPOINTMENT)))
+    record.update(changes)
+    return record
+
+def test_validated_values_are_stripped():
+    values = core.validate_appointment(fields(time='09:00 ', doctor_name=' ERIC ', age=' 20'))
+    assert values == APPOINTMENT
+    for changes in ({'time': '9h'}, {'date': '02/03/2026'}, {'age': '-1'}, {'doctor_name': '  '}):
+        with pytest.raises(ValueError):
+            core.validate_appointment(fields(**changes))
+
+def test_conflict_check_with_whitespace_inputs(database):
+    core.create_database_and_table()
+    first = core.add_appointment(*APPOINTMENT)
+    # Mêmes valeurs que le formulaire : vérifiées puis enregistrées après validation
+    values = core.validate_appointment(fields(time='09:15 ', doctor_name='ERIC '))
+    date, time, _, _, _, _, doctor_name, _ = values
+    assert core.find_conflict(doctor_name, date, time) == first
+    assert core.find_conflict(doctor_name, date, time, exclude_id=first) is None
+    second = core.add_appointment(*values)
+    # Pas de second médecin « ERIC » créé par les espaces
+    conn = core.get_connection()
+    assert conn.execute("SELECT COUNT(*) FROM doctors WHERE name LIKE 'ERIC%'").fetchone()[0] == 1
+    assert core.find_conflict('ERIC', '2026-03-02', '09:00', exclude_id=first) == second
+
+def test_conflicts_follow_writes(database):
+    core.create_database_and_table()
+    first = core.add_appointment(*APPOINTMENT)
+    assert core.find_conflict('ERIC', '2026-03-02', '09:00') == first
+    # Créneau contigu : pas de chevauchement
+    later = '%02d:%02d' % divmod(9 * 60 + core.APPOINTMENT_DURATION, 60)
+    assert core.find_conflict('ERIC', '2026-03-02', later) is None
+    assert core.find_conflict('SAWADOGO', '2026-03-02', '09:00') is None
+    core.modify_appointment(first, '2026-03-02', '11:00', *APPOINTMENT[2:])
+    assert core.find_conflict('ERIC', '2026-03-02', '09:00') is None
+    assert core.find_conflict('ERIC', '2026-03-02', '11:00') == first
+    core.delete_appointment(first)
+    assert core.find_conflict('ERIC', '2026-03-02', '11:00') is None
+
+def test_next_free_slots_skip_booked_slots(database):
+    core.create_database_and_table()
+    day = datetime.date.today() + datetime.timedelta(days=1)
+    opening = '%02d:%02d' % divmod(core.WORKING_HOURS[0], 60)
+    second = '%02d:%02d' % divmod(core.WORKING_HOURS[0] + core.APPOINTMENT_DURATION, 60)
+    core.add_appointment(day.isoformat(), opening, *APPOINTMENT[2:])
+    after = datetime.datetime.combine(day, datetime.time())
+    slots = core.schedule.next_free_slots('ERIC', count=2, after=after)
+    assert slots[0] == (day.isoformat(), second, 'ERIC')
+    assert len(slots) == 2
+    # Par spécialité : tous les médecins de la spécialité sont proposés
+    core.add_appointment(day.isoformat(), opening, 'ZONGO ISSA', 'Homme', 45, 'URGENCE', 'OUEDRAOGO', 'GENICOLOGUE')
+    slots = core.schedule.next_free_slots(doctor_specialty='GENICOLOGUE', count=2, after=after)
+    assert slots == [(day.isoformat(), second, 'ERIC'), (day.isoformat(), second, 'OUEDRAOGO')]
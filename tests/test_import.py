@@ -0,0 +1,82 @@
+import pytest
+
+import rendezvous_core as core
+from helpers import recount, statistics
+
+ROW = '2026-04-{day:02d},09:30,ZONGO ISSA,Homme,45,{reason},ERIC,GENICOLOGUE'
+
+def write_csv(path, rows) -> str:
+    path.write_text('\n'.join([','.join(core.IMPORT_FIELDS)] + rows), encoding='utf-8')
+    return str(path)
+
+def test_invalid_rows_are_rejected_with_their_line(database, tmp_path):
+    core.create_database_and_table()
+    rows = [ROW.format(day=day, reason='URGENCE') for day in range(1, 6)]
+    rows[1] = rows[1].replace('2026-04-02', '2026-04-31')
+    rows[2] = rows[2].replace('09:30', '9h30')
+    rows[3] = rows[3].replace(',45,', ',quarante,')
+    rows.append('2026-04-06,09:30,ZONGO ISSA')
+    imported, rejects = core.import_appointments(write_csv(tmp_path / 'import.csv', rows), batch_size=2)
+    assert imported == 2
+    assert [line for line, _ in rejects] == [3, 4, 5, 7]
+    assert 'date invalide' in rejects[0][1] and 'champ manquant' in rejects[3][1]
+
+def test_json_lines_import(database, tmp_path):
+    core.create_database_and_table()
+    import_file = tmp_path / 'import.jsonl'
+    import_file.write_text('\n'.join([
+        '{"date": "2026-04-01", "time": "09:30", "patient_name": "ZONGO ISSA", "gender": "Homme", "age": 45, '
+        '"consultation_reason": "URGENCE", "doctor_name": "ERIC", "doctor_specialty": "GENICOLOGUE"}',
+        '',
+        '{"date": "2026-04-01"',
+        '["pas", "un", "objet"]',
+    ]), encoding='utf-8')
+    imported, rejects = core.import_appointments(str(import_file))
+    assert imported == 1
+    assert [line for line, _ in rejects] == [3, 4]
+    assert next(core.iter_appointments())[1:] == ('2026-04-01', '09:30', 'ZONGO ISSA', 'Homme', 45, 'URGENCE', 'ERIC', 'GENICOLOGUE')
+
+def test_refused_batch_is_replayed_row_by_row(database, tmp_path):
+    core.create_database_and_table()
+    conn = core.get_connection()
+    # Règle propre au cabinet : la base refuse certaines lignes, le lot entier échoue une première fois
+    conn.execute('''
+        CREATE TRIGGER refuse_reason BEFORE INSERT ON appointments WHEN new.consultation_reason = 'REFUS'
+        BEGIN SELECT RAISE(ABORT, 'motif refusé'); END
+    ''')
+    rows = [ROW.format(day=day, reason='REFUS' if day in (3, 7) else 'URGENCE') for day in range(1, 11)]
+    position = core.change_log_position()
+    imported, rejects = core.import_appointments(write_csv(tmp_path / 'import.csv', rows), batch_size=4)
+    assert imported == 8
+    assert rejects == [(4, 'motif refusé'), (8, 'motif refusé')]
+    appointments = list(core.iter_appointments())
+    assert [row[1] for row in appointments] == [f'2026-04-{day:02d}' for day in range(1, 11) if day not in (3, 7)]
+    # Tables dérivées à jour dans les deux chemins, et déclencheurs rétablis après chaque lot
+    assert statistics(conn) == recount(conn)
+    assert core.changes_since(position)[1].keys() == {row[0] for row in appointments}
+    assert [row[0] for row in core.search_appointments_by_patient('ZONGO')] == [row[0] for row in appointments]
+    assert {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")} >= {
+        'appointments_stats_insert', 'appointments_log_insert', 'patients_fts_insert', 'doctors_fts_insert'}
+
+def test_unreadable_file_is_an_error(database, tmp_path):
+    core.create_database_and_table()
+    with pytest.raises(OSError):
+        core.import_appointments(str(tmp_path / 'absent.csv'))
+    (tmp_path / 'latin1.csv').write_bytes(','.join(core.IMPORT_FIELDS).encode() + b'\n2026-04-01,09:30,Z\xe9,Homme,45,U,E,G')
+    with pytest.raises(UnicodeDecodeError):
+        core.import_appointments(str(tmp_path / 'latin1.csv'))
+
+def test_database_errors_keep_the_imported_batches(database, tmp_path, capsys):
+    core.create_database_and_table()
+    rows = [ROW.format(day=day, reason='URGENCE') for day in range(1, 7)]
+
+    def records():
+        for line_number, record in core.read_import_records(write_csv(tmp_path / 'import.csv', rows)):
+            if line_number == 5:
+                # Écriture bloquée en cours d'import : les lots déjà validés restent
+                core.get_connection().execute('PRAGMA query_only = ON')
+            yield line_number, record
+    assert core.import_records(records(), batch_size=2) == (2, [])
+    assert 'Erreur' in capsys.readouterr().err
+    core.get_connection().execute('PRAGMA query_only = OFF')
+    assert len(list(core.iter_appointments())) == 2
@@ -0,0 +1,64 @@
+import sqlite3
+
+import pytest
+
+import rendezvous_core as core
+from helpers import add, recount, statistics
+
+def create_legacy_database(path: str, user_version: int) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE appointments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            time TEXT NOT NULL,
+            patient_name TEXT NOT NULL,
+            gender TEXT NOT NULL,
+            age INTEGER NOT NULL,
+            consultation_reason TEXT NOT NULL,
+            doctor_name TEXT NOT NULL,
+            doctor_specialty TEXT NOT NULL
+        )
+    ''')
+    conn.executemany('''
+        INSERT INTO appointments (id, date, time, patient_name, gender, age, consultation_reason, doctor_name, doctor_specialty)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        (1, '2024-07-26', '20:01', 'KAGAMBEGA RENE', 'Homme', 20, 'MALADE', 'ERIC', 'GENICOLOGUE'),
+        (2, '26/07/2024', '9h', 'OUEDRAOGO AWA', 'Femme', 31, 'CONTROLE', 'ERIC', 'GENICOLOGUE'),
+        (3, '7/27/24', '14H30', 'KAGAMBEGA RENE', 'Homme', 20, 'VACCIN', 'SAWADOGO', 'PEDIATRE'),
+        (4, '28.07.2024', '08:15:00', 'OUEDRAOGO AWA', 'Femme', 31, 'MALADE', 'SAWADOGO', 'PEDIATRE'),
+        (5, 'demain', '10:00', 'ZONGO ISSA', 'Homme', 45, 'URGENCE', 'ERIC', 'GENICOLOGUE'),
+        (7, '2024-07-29', '25:00', 'ZONGO ISSA', 'Homme', 45, 'URGENCE', 'ERIC', 'GENICOLOGUE'),
+    ])
+    conn.execute(f'PRAGMA user_version = {user_version}')
+    conn.commit()
+    conn.close()
+
+@pytest.mark.parametrize('user_version', [0, 1])
+def test_legacy_database_is_migrated(database, user_version):
+    create_legacy_database(database, user_version)
+    core.create_database_and_table()
+    conn = core.get_connection()
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == core.SCHEMA_VERSION
+    assert list(core.iter_appointments('id')) == [
+        (1, '2024-07-26', '20:01', 'KAGAMBEGA RENE', 'Homme', 20, 'MALADE', 'ERIC', 'GENICOLOGUE'),
+        (2, '2024-07-26', '09:00', 'OUEDRAOGO AWA', 'Femme', 31, 'CONTROLE', 'ERIC', 'GENICOLOGUE'),
+        (3, '2024-07-27', '14:30', 'KAGAMBEGA RENE', 'Homme', 20, 'VACCIN', 'SAWADOGO', 'PEDIATRE'),
+        (4, '2024-07-28', '08:15', 'OUEDRAOGO AWA', 'Femme', 31, 'MALADE', 'SAWADOGO', 'PEDIATRE'),
+    ]
+    # Dates ou heures illisibles : gardées à part, pas perdues
+    assert sorted(row[0] for row in conn.execute('SELECT id FROM appointments_unmigrated')) == [5, 7]
+    # Un patient par (nom, genre, âge), y compris celui des rendez-vous à corriger
+    assert [row[0] for row in conn.execute('SELECT name FROM patients ORDER BY name')] == ['KAGAMBEGA RENE', 'OUEDRAOGO AWA', 'ZONGO ISSA']
+    assert statistics(conn) == recount(conn)
+    # Les identifiants supprimés avant la migration ne sont jamais réattribués
+    assert add() == 8
+    assert core.search_appointments_by_patient('OUEDRAOGO')[0][3] == 'OUEDRAOGO AWA'
+
+def test_new_database_starts_at_current_schema(database):
+    core.create_database_and_table()
+    conn = core.get_connection()
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == core.SCHEMA_VERSION
+    assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'appointments_unmigrated'").fetchone() is None
+    assert core.change_log_position() == 0
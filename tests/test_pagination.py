@@ -0,0 +1,76 @@
+import json
+import sqlite3
+
+import pytest
+
+import rendezvous_cli
+import rendezvous_core as core
+
+PATIENT = ('KAGAMBEGA RENE', 'Homme', 20, 'MALADE', 'ERIC', 'GENICOLOGUE')
+
+@pytest.fixture
+def appointments(database):
+    core.create_database_and_table()
+    return [core.add_appointment(f'2026-03-{day:02d}', '09:00', *PATIENT) for day in range(1, 11)]
+
+def break_database(path: str) -> None:
+    # Une autre connexion retire la vue lue par les listes : la page suivante échoue
+    other = sqlite3.connect(path)
+    other.execute('DROP VIEW appointment_details')
+    other.close()
+
+def test_pages_resume_after_the_returned_key(appointments):
+    rows, after = core.appointments_page(limit=4)
+    assert [row[0] for row in rows] == appointments[:4]
+    rows, after = core.appointments_page(limit=4, after=after)
+    assert [row[0] for row in rows] == appointments[4:8]
+    rows, after = core.appointments_page(limit=4, after=after)
+    assert [row[0] for row in rows] == appointments[8:] and after is None
+    assert [row[0] for row in core.iter_appointments(descending=True, page_size=3)] == appointments[::-1]
+    # Reprise d'un parcours par identifiant : clé à une seule colonne
+    _, after = core.appointments_page('id', limit=5)
+    assert [row[0] for row in core.iter_appointments('id', after=after)] == appointments[5:]
+    with pytest.raises(ValueError):
+        core.appointments_page(limit=4, after=[1])
+
+def test_error_on_a_later_page_is_raised(appointments, database):
+    rows = core.iter_appointments(page_size=4)
+    assert [next(rows)[0] for _ in range(4)] == appointments[:4]
+    break_database(database)
+    with pytest.raises(sqlite3.Error):
+        next(rows)
+
+def test_export_failure_is_reported(appointments, database, tmp_path, capsys):
+    export_file = tmp_path / 'export.csv'
+    assert core.export_appointments(str(export_file), page_size=4) == len(appointments)
+    assert core.export_appointments(str(tmp_path)) is None
+    break_database(database)
+    assert core.export_appointments(str(export_file)) is None
+    assert 'Erreur' in capsys.readouterr().err
+
+def test_cli_reports_listing_failures(appointments, database, tmp_path, capsys):
+    break_database(database)
+    assert rendezvous_cli.main(['--db', database, 'export', str(tmp_path / 'export.csv')]) == 1
+    assert json.loads(capsys.readouterr().out)['error']
+    assert rendezvous_cli.main(['--db', database, 'list']) == 1
+    assert 'Erreur' in capsys.readouterr().err
+
+@pytest.mark.parametrize('order_by', core.SORT_COLUMNS)
+@pytest.mark.parametrize('descending', [False, True])
+def test_sorted_pages_use_an_index(appointments, order_by, descending):
+    conn = core.get_connection()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        list(core.iter_appointments(order_by, descending, page_size=4))
+    finally:
+        conn.set_trace_callback(None)
+    pages = [sql for sql in statements if sql.startswith('SELECT')]
+    assert len(pages) == 3
+    for sql in pages:
+        plan = ' '.join(row[-1] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql))
+        assert 'TEMP B-TREE' not in plan
+
+def test_unindexed_sort_columns_are_rejected(appointments):
+    with pytest.raises(ValueError):
+        list(core.iter_appointments('patient_name'))
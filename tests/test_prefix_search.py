@@ -0,0 +1,50 @@
+import pytest
+
+import rendezvous_core as core
+from helpers import add
+
+@pytest.fixture
+def patients(database):
+    core.create_database_and_table()
+    return {name: add(date=f'2026-03-{day:02d}', patient_name=name)
+            for day, name in enumerate(['OUEDRAOGO AWA', 'KAGAMBEGA RENE', 'KABORE AWA', 'ZONGO ISSA'], 1)}
+
+def ids(appointments) -> list:
+    return [appointment[0] for appointment in appointments]
+
+def test_prefix_matches_any_word_start():
+    assert core.matches_prefix('OUEDRAOGO AWA', 'aw')
+    assert core.matches_prefix('OUEDRAOGO AWA', 'ouedraogo a')
+    assert not core.matches_prefix('OUEDRAOGO AWA', 'rao')
+
+def test_prefix_search_is_sorted_by_name(patients):
+    appointments, complete = core.search_appointments_by_prefix('patients', 'awa')
+    assert complete
+    assert ids(appointments) == [patients['KABORE AWA'], patients['OUEDRAOGO AWA']]
+    assert ids(core.search_appointments_by_prefix('patients', '  ka')[0]) == [patients['KABORE AWA'], patients['KAGAMBEGA RENE']]
+    assert core.search_appointments_by_prefix('patients', 'rao') == ([], True)
+    assert core.search_appointments_by_prefix('patients', ' ') == ([], False)
+    assert ids(core.search_appointments_by_prefix('doctors', 'er')[0]) == sorted(patients.values())
+
+def test_incomplete_results_are_not_narrowed(patients):
+    appointments, complete = core.search_appointments_by_prefix('patients', 'k', limit=1)
+    assert not complete and ids(appointments) == [patients['KABORE AWA']]
+    # Un rendez-vous de plus pour le même patient : la limite porte aussi sur les lignes
+    add(date='2026-03-10', patient_name='ZONGO ISSA')
+    assert core.search_appointments_by_prefix('patients', 'zongo', limit=1)[1] is False
+
+def test_narrowing_matches_a_new_query(patients):
+    appointments, complete = core.search_appointments_by_prefix('patients', 'k')
+    assert complete
+    for prefix in ('ka', 'kab', 'awa', 'kagambega r'):
+        assert core.narrow_appointments(appointments, 'patients', prefix) == \
+            [row for row in core.search_appointments_by_prefix('patients', prefix)[0] if row[3].startswith('K')]
+
+def test_new_names_are_indexed_after_writes(patients):
+    assert core.search_appointments_by_prefix('patients', 'sawa')[0] == []
+    new = add(patient_name='SAWADOGO ALI', doctor_name='SAWADOGO', specialty='PEDIATRE')
+    assert ids(core.search_appointments_by_prefix('patients', 'sawa')[0]) == [new]
+    assert ids(core.search_appointments_by_prefix('doctors', 'saw')[0]) == [new]
+    # Rendez-vous supprimé : le nom reste indexé mais ne ramène plus rien
+    core.delete_appointment(new)
+    assert core.search_appointments_by_prefix('patients', 'sawa') == ([], True)
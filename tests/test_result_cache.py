@@ -0,0 +1,37 @@
+import sqlite3
+import threading
+
+import rendezvous_core as core
+from helpers import add
+
+def test_result_cache_sees_writes_from_other_connections(database):
+    core.create_database_and_table()
+    first = add()
+    second = add(patient_name='OUEDRAOGO AWA')
+    assert [row[0] for row in core.search_appointments_by_patient('KAGAMBEGA')] == [first]
+    receipt = core.generate_receipt(second)
+    assert 'KAGAMBEGA RENE' in core.generate_receipt(first)
+
+    # Écriture par une autre connexion du même processus (un autre thread)
+    thread = threading.Thread(target=add, kwargs={'date': '2026-03-04', 'patient_name': 'KAGAMBEGA RENE'})
+    thread.start()
+    thread.join()
+    assert len(core.search_appointments_by_patient('KAGAMBEGA')) == 2
+
+    # Écriture par une connexion étrangère (un autre processus) : le reçu touché est recalculé
+    other = sqlite3.connect(database)
+    with other:
+        other.execute('UPDATE appointments SET consultation_reason = ?, starts_at = starts_at + 3600 WHERE id = ?', ('VACCIN', first))
+    other.close()
+    assert 'Appointment Time: 10:00' in core.generate_receipt(first)
+    hits = core.result_cache.hits
+    # Le reçu non touché reste servi par le cache
+    assert core.generate_receipt(second) == receipt
+    assert core.result_cache.hits == hits + 1
+
+    other = sqlite3.connect(database)
+    with other:
+        other.execute('DELETE FROM appointments WHERE id = ?', (first,))
+    other.close()
+    assert core.generate_receipt(first) == "Rendez-vous non trouvé."
+    assert [row[0] for row in core.search_appointments_by_patient('KAGAMBEGA')] == [second + 1]
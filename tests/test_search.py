@@ -0,0 +1,38 @@
+import pytest
+
+import rendezvous_core as core
+from helpers import add
+
+@pytest.fixture
+def patients(database):
+    core.create_database_and_table()
+    return {name: add(date=f'2026-03-{day:02d}', patient_name=name)
+            for day, name in enumerate(['OUEDRAOGO KAGABE', 'KAGAMBEGA RENE', 'ZONGO ISSA', 'SOME "KAGA" AWA'], 1)}
+
+def names(appointments) -> list:
+    return [appointment[3] for appointment in appointments]
+
+def test_name_starts_are_ranked_first(patients):
+    assert core.fts_enabled
+    # Sous-chaîne partout dans le nom, sans tenir compte de la casse ; début de nom en tête, puis score bm25
+    found = names(core.search_appointments_by_patient('kaga'))
+    assert found[0] == 'KAGAMBEGA RENE'
+    assert sorted(found[1:]) == ['OUEDRAOGO KAGABE', 'SOME "KAGA" AWA']
+    assert names(core.search_appointments_by_patient('"KAGA"')) == ['SOME "KAGA" AWA']
+    assert core.search_appointments_by_patient('INCONNU') == []
+
+def test_short_texts_fall_back_to_like(patients):
+    # Moins de trois caractères : pas de trigramme, même classement
+    assert names(core.search_appointments_by_patient('zo')) == ['ZONGO ISSA']
+    assert names(core.search_appointments_by_patient('%')) == []
+    assert [row[0] for row in core.search_appointments_by_doctor('er')] == sorted(patients.values())
+
+def test_search_follows_new_names_and_periods(patients):
+    late = add(date='2026-04-01', patient_name='KAGAMBEGA RENE')
+    assert [row[0] for row in core.search_appointments_by_patient('KAGAMBEGA')] == [patients['KAGAMBEGA RENE'], late]
+    assert [row[0] for row in core.search_appointments_by_patient('KAGAMBEGA', date_from='2026-03-15')] == [late]
+    add(patient_name='KAGAMBA PAUL')
+    found = names(core.search_appointments_by_patient('KAGAMB'))
+    assert sorted(found) == ['KAGAMBA PAUL', 'KAGAMBEGA RENE', 'KAGAMBEGA RENE']
+    # À début de nom égal, le score bm25 favorise le nom le plus court
+    assert found[0] == 'KAGAMBA PAUL'
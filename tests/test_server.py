@@ -0,0 +1,133 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+import rendezvous_core as core
+import rendezvous_server
+from rendezvous_client import ServiceBackend, ServiceError
+
+APPOINTMENT = ('2026-03-02', '09:00', 'KAGAMBEGA RENE', 'Homme', 20, 'MALADE', 'ERIC', 'GENICOLOGUE')
+
+@pytest.fixture
+def backend(database):
+    # Service lancé dans ce processus, sur un port libre, avec sa propre boucle asyncio
+    core.create_database_and_table()
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    service = rendezvous_server.AppointmentService()
+    loop = asyncio.new_event_loop()
+    serving = loop.create_task(service.serve('127.0.0.1', port))
+
+    def run() -> None:
+        try:
+            loop.run_until_complete(serving)
+        except asyncio.CancelledError:
+            pass
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            break
+        except OSError:
+            time.sleep(0.02)
+    client = ServiceBackend(f'http://127.0.0.1:{port}')
+    yield client
+    client.close_connections()
+    loop.call_soon_threadsafe(serving.cancel)
+    thread.join()
+    loop.close()
+    service.close()
+
+def test_round_trip(backend):
+    first = backend.add_appointment(*APPOINTMENT)
+    with pytest.raises(ServiceError) as conflict:
+        backend.add_appointment(*APPOINTMENT)
+    assert conflict.value.status == 409 and conflict.value.details['conflict_id'] == first
+    second = backend.add_appointment(*APPOINTMENT, allow_conflict=True)
+    assert backend.modify_appointment(second, '2026-03-02', '10:00', *APPOINTMENT[2:]) == second
+    assert [row[0] for row in backend.iter_appointments()] == [first, second]
+    assert 'Appointment Time: 10:00' in backend.generate_receipt(second)
+    backend.delete_appointment(first)
+    assert [row[0] for row in backend.search_appointments_by_patient('KAGAMBEGA')] == [second]
+
+def test_import_sends_the_file_contents(backend, tmp_path):
+    import_file = tmp_path / 'import.csv'
+    import_file.write_text('\n'.join([','.join(core.IMPORT_FIELDS)] + [
+        f'2026-04-{day:02d},09:30,ZONGO ISSA,Homme,45,URGENCE,ERIC,GENICOLOGUE' for day in range(1, 21)
+    ] + ['2026-04-31,09:30,ZONGO ISSA,Homme,45,URGENCE,ERIC,GENICOLOGUE']), encoding='utf-8')
+    # Petits lots : plusieurs envois, numéros de ligne conservés
+    imported, rejects = backend.import_appointments(str(import_file), batch_size=7)
+    assert imported == 20
+    assert [line for line, _ in rejects] == [22]
+    assert len(list(core.iter_appointments())) == 20
+
+def test_import_of_unreadable_file_is_an_error(backend, tmp_path):
+    with pytest.raises(OSError):
+        backend.import_appointments(str(tmp_path / 'absent.csv'))
+
+def test_import_does_not_open_paths_on_the_server(backend):
+    with pytest.raises(ServiceError) as error:
+        backend._request('POST', '/import', body={'path': '/etc/passwd'})
+    assert error.value.status == 400
+
+def test_listing_resumes_after_a_key(backend):
+    ids = [backend.add_appointment(f'2026-03-{day:02d}', '09:00', *APPOINTMENT[2:]) for day in range(1, 8)]
+    assert [row[0] for row in backend.iter_appointments(page_size=3)] == ids
+    page = backend._request('GET', '/appointments', {'limit': 3, 'descending': 'true'})
+    assert [record['id'] for record in page['appointments']] == ids[:-4:-1]
+    page = backend._request('GET', '/appointments', {'limit': 10, 'descending': 'true', 'after': json.dumps(page['after'])})
+    assert [record['id'] for record in page['appointments']] == ids[-4::-1]
+    assert page['after'] is None
+
+@pytest.mark.parametrize('path, params', [
+    ('/appointments', {'limit': 0}),
+    ('/appointments', {'limit': 'abc'}),
+    ('/appointments', {'limit': '-3'}),
+    ('/appointments', {'after': '{"x": 1}'}),
+    ('/appointments', {'order_by': 'patient_name'}),
+    ('/search/prefix', {'q': 'ka', 'limit': 0}),
+    ('/free-slots', {'doctor_name': 'ERIC', 'count': 0}),
+    ('/changes', {'since': 'x'}),
+    ('/conflict', {'doctor_name': 'ERIC', 'date': '2026-03-02', 'time': '09:00', 'exclude_id': '1.5'}),
+])
+def test_bad_query_values_are_rejected(backend, path, params):
+    with pytest.raises(ServiceError) as error:
+        backend._request('GET', path, params)
+    assert error.value.status == 400
+
+@pytest.mark.parametrize('body', [
+    {'records': [[1, {}]], 'batch_size': [1]},
+    {'records': [[1, {}]], 'batch_size': 0},
+    {'records': [[1, {}]], 'batch_size': True},
+    {'records': 'a.csv'},
+    {'records': [['1', {}]]},
+])
+def test_bad_import_bodies_are_rejected(backend, body):
+    with pytest.raises(ServiceError) as error:
+        backend._request('POST', '/import', body=body)
+    assert error.value.status == 400
+
+def test_unexpected_errors_still_get_a_response(backend, monkeypatch):
+    def broken(appointment_id):
+        raise RuntimeError("panne")
+    monkeypatch.setattr(core, 'generate_receipt', broken)
+    with pytest.raises(ServiceError) as error:
+        backend.generate_receipt(1)
+    assert error.value.status == 500
+    # La connexion persistante reste utilisable
+    assert backend.change_log_position() == 0
+
+def test_core_rejects_empty_pages_and_slot_counts(database):
+    core.create_database_and_table()
+    core.add_appointment(*APPOINTMENT)
+    with pytest.raises(ValueError):
+        core.appointments_page(limit=0)
+    assert core.next_free_slots('ERIC', count=0) == []
+    assert len(core.next_free_slots('ERIC', count=1)) == 1
@@ -0,0 +1,38 @@
+import rendezvous_core as core
+from helpers import add, recount, statistics
+
+def test_statistics_follow_writes_and_imports(database, tmp_path):
+    core.create_database_and_table()
+    conn = core.get_connection()
+    first = add()
+    add(date='2015-05-04', reason='VACCIN')
+    third = add(date='2016-01-10', doctor_name='SAWADOGO', specialty='PEDIATRE')
+    assert statistics(conn) == recount(conn)
+
+    assert core.modify_appointment(first, '2026-03-03', '10:00', 'KAGAMBEGA RENE', 'Homme', 20, 'CONTROLE',
+                                   'SAWADOGO', 'PEDIATRE') == first
+    assert statistics(conn) == recount(conn)
+
+    core.delete_appointment(third)
+    assert statistics(conn) == recount(conn)
+
+    import_file = tmp_path / 'import.csv'
+    import_file.write_text('\n'.join([','.join(core.IMPORT_FIELDS)] + [
+        f'2015-06-{day:02d},09:30,ZONGO ISSA,Homme,45,URGENCE,ERIC,GENICOLOGUE' for day in range(1, 11)
+    ] + ['pas-une-date,09:30,ZONGO ISSA,Homme,45,URGENCE,ERIC,GENICOLOGUE']), encoding='utf-8')
+    imported, rejects = core.import_appointments(str(import_file))
+    assert imported == 10 and [line for line, _ in rejects] == [12]
+    assert statistics(conn) == recount(conn)
+
+def test_appointment_statistics(database):
+    core.create_database_and_table()
+    add()
+    add(date='2026-03-03', reason='VACCIN')
+    add(date='2026-03-03', doctor_name='SAWADOGO', specialty='PEDIATRE')
+    add(date='2026-05-01')
+    assert core.appointment_statistics('2026-03-01', '2026-03-31') == {
+        'days': [('2026-03-02', 1), ('2026-03-03', 2)],
+        'doctors': [('ERIC', 'GENICOLOGUE', 3), ('SAWADOGO', 'PEDIATRE', 1)],
+        'specialties': [('GENICOLOGUE', 3), ('PEDIATRE', 1)],
+        'reasons': [('MALADE', 3), ('VACCIN', 1)],
+    }